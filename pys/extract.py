@@ -1,80 +1,562 @@
+import os
 import sys
-import subprocess
 import json
+import mmap
+import shutil
+import struct
+import bisect
+import subprocess
+import hashlib
+import asyncio
+import itertools
 from pathlib import Path
 
-def extract_subtitles(mkv_file_path: Path):
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Resolved once so each spawn skips the PATH search
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
+FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+
+# ffprobe results for a whole media library are cached in two files:
+# a sorted index of fixed-size records, and the probe outputs they point to
+PROBE_CACHE_DIR = Path.home() / ".cache" / "extract_subs"
+PROBE_INDEX_FILE = PROBE_CACHE_DIR / "probe_index.v2.bin"
+PROBE_BLOBS_FILE = PROBE_CACHE_DIR / "probe_blobs.v2.jsonl"
+
+# Index record: blake2b(path)[:16], mtime_ns, offset and length of the blob line
+_INDEX_RECORD = struct.Struct("<16sqQI")
+
+# Probes made during this run, written to the cache together by _cache_flush
+_staged_probes = {}
+
+# Subtitle codecs that are already WebVTT and can be copied without re-encoding
+COPYABLE_SUBTITLE_CODECS = {"webvtt"}
+
+# Bitmap subtitle codecs, which ffmpeg can't convert to WebVTT
+IMAGE_SUBTITLE_CODECS = {"hdmv_pgs_subtitle", "dvd_subtitle", "dvb_subtitle", "xsub"}
+
+# Files handed to a single ffmpeg process, amortizing its startup cost
+FFMPEG_BATCH_SIZE = 8
+
+
+def _priority_prefix() -> list:
     """
-    Extracts all subtitle tracks from a given MKV file and saves them as
-    separate WebVTT (.vtt) files.
+    Returns the ionice wrapper for ffmpeg: top best-effort I/O priority
+    when ionice exists. CPU priority is left alone.
+    """
+    if shutil.which("ionice"):
+        return ["ionice", "-c", "2", "-n", "0"]
+    return []
+
+
+FFMPEG_PRIORITY_PREFIX = _priority_prefix()
+
+
+def _parse_cpulist(text: str) -> set:
+    """Parses a kernel CPU list such as "0-7,16-23" into a set of CPU numbers."""
+    cpus = set()
+    for part in text.strip().split(","):
+        if part:
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _numa_cpu_sets() -> list:
+    """
+    Returns the CPUs this script may use, grouped by NUMA node. A single
+    group means there is no node to choose, and ffmpeg is left unpinned.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return []
+    allowed = os.sched_getaffinity(0)
+    nodes = []
+    for cpulist in sorted(Path("/sys/devices/system/node").glob("node[0-9]*/cpulist")):
+        try:
+            cpus = _parse_cpulist(cpulist.read_text()) & allowed
+        except (OSError, ValueError):
+            continue
+        if cpus:
+            nodes.append(cpus)
+    return nodes
+
+
+NUMA_CPU_SETS = _numa_cpu_sets()
+
+
+class _IndexKeys:
+    """Sequence view over the path hashes of a mapped index, for bisect."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.buffer) // _INDEX_RECORD.size
+
+    def __getitem__(self, position):
+        start = position * _INDEX_RECORD.size
+        return self.buffer[start:start + 16]
+
+
+def _lock(file, operation):
+    """flock()s the file where supported; caching stays unlocked elsewhere."""
+    if fcntl is not None:
+        fcntl.flock(file, operation)
+
+
+def _path_key(mkv_file_path: Path) -> bytes:
+    """Returns the 16-byte index key for a file."""
+    return hashlib.blake2b(str(mkv_file_path.resolve()).encode(), digest_size=16).digest()
+
+
+def _cache_lookup(mkv_file_path: Path):
+    """
+    Finds a cached ffprobe output with a binary search over the mapped index.
 
     Args:
         mkv_file_path (Path): The path to the input MKV file.
+
+    Returns:
+        bytes | None: The cached output, or None if missing or the file has changed since.
+    """
+    key = _path_key(mkv_file_path)
+    with open(PROBE_INDEX_FILE, "rb") as index:
+        _lock(index, getattr(fcntl, "LOCK_SH", 0))
+        if os.fstat(index.fileno()).st_size < _INDEX_RECORD.size:
+            return None
+        with mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            keys = _IndexKeys(mapped)
+            position = bisect.bisect_left(keys, key)
+            if position == len(keys) or keys[position] != key:
+                return None
+            _, mtime_ns, offset, length = _INDEX_RECORD.unpack_from(mapped, position * _INDEX_RECORD.size)
+
+        if mtime_ns != mkv_file_path.stat().st_mtime_ns:
+            return None
+
+        # Read under the index lock, since a compaction moves the blobs
+        with open(PROBE_BLOBS_FILE, "rb") as blobs:
+            blobs.seek(offset)
+            _, ffprobe_output = json.loads(blobs.read(length))
+    return ffprobe_output.encode()
+
+
+def _cache_stage(mkv_file_path: Path, ffprobe_output: bytes):
+    """
+    Holds an ffprobe output until _cache_flush writes this run's probes.
+
+    Args:
+        mkv_file_path (Path): The path to the input MKV file.
+        ffprobe_output (bytes): The raw ffprobe stdout.
+    """
+    resolved = str(mkv_file_path.resolve())
+    _staged_probes[_path_key(mkv_file_path)] = (resolved, mkv_file_path.stat().st_mtime_ns, ffprobe_output)
+
+
+def _compact_blobs(records: dict) -> dict:
+    """
+    Rewrites the blob file with only the entries the index points to,
+    dropping those whose file has since been deleted or changed.
+
+    Args:
+        records (dict[bytes, tuple]): Index records by path key.
+
+    Returns:
+        dict[bytes, tuple]: The records kept, pointing into the new blob file.
+    """
+    compacted = {}
+    temporary = PROBE_BLOBS_FILE.with_suffix(".tmp")
+    with open(PROBE_BLOBS_FILE, "rb") as blobs, open(temporary, "wb") as rewritten:
+        for key, mtime_ns, offset, length in sorted(records.values(), key=lambda record: record[2]):
+            blobs.seek(offset)
+            line = blobs.read(length)
+            try:
+                if os.stat(json.loads(line)[0]).st_mtime_ns != mtime_ns:
+                    continue
+            except (OSError, ValueError):
+                continue
+            compacted[key] = (key, mtime_ns, rewritten.tell(), length)
+            rewritten.write(line)
+    os.replace(temporary, PROBE_BLOBS_FILE)
+    return compacted
+
+
+def _cache_flush():
+    """
+    Writes the probes staged during this run to the cache in one go: their
+    blobs are appended, and the index is merged and rewritten once. When
+    superseded entries make up more than half of the blob file, it is
+    compacted. The index lock is held throughout, so concurrent runs can
+    share the cache.
+    """
+    if not _staged_probes:
+        return
+    staged = dict(_staged_probes)
+    _staged_probes.clear()
+    os.makedirs(PROBE_CACHE_DIR, exist_ok=True)
+
+    with open(PROBE_INDEX_FILE, "a+b") as index:
+        _lock(index, getattr(fcntl, "LOCK_EX", 0))
+
+        index.seek(0)
+        data = index.read()
+        data = data[:len(data) - len(data) % _INDEX_RECORD.size]
+        records = {record[0]: record for record in _INDEX_RECORD.iter_unpack(data)}
+
+        with open(PROBE_BLOBS_FILE, "ab") as blobs:
+            offset = blobs.tell()
+            for key, (resolved, mtime_ns, ffprobe_output) in staged.items():
+                line = json.dumps([resolved, ffprobe_output.decode()]).encode() + b"\n"
+                blobs.write(line)
+                records[key] = (key, mtime_ns, offset, len(line))
+                offset += len(line)
+
+        if offset > 2 * sum(record[3] for record in records.values()):
+            records = _compact_blobs(records)
+
+        index.truncate(0)
+        index.write(b"".join(_INDEX_RECORD.pack(*records[key]) for key in sorted(records)))
+
+
+def _parse_streams(ffprobe_output: bytes) -> list:
+    """
+    Parses ffprobe's `csv=p=0` rows (index,codec_name[,language]) into stream dicts.
+
+    Args:
+        ffprobe_output (bytes): The raw ffprobe stdout.
+    """
+    streams = []
+    for row in ffprobe_output.decode().splitlines():
+        if not row:
+            continue
+        stream = dict(zip(('index', 'codec_name', 'language'), row.split(',')))
+        stream['index'] = int(stream['index'])
+        streams.append(stream)
+    return streams
+
+
+def _fadvise(file_path: Path, advice: int):
+    """
+    Applies a posix_fadvise hint to the whole file.
+    No-op on platforms without posix_fadvise.
+
+    Args:
+        file_path (Path): The file the hint applies to.
+        advice (int): One of the os.POSIX_FADV_* constants.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    finally:
+        os.close(fd)
+
+
+def _prefetch(mkv_file_path: Path):
+    """
+    Asks the kernel to start reading the whole file into the page cache, so
+    ffmpeg's sequential reads are served from memory instead of blocking on disk.
+
+    Args:
+        mkv_file_path (Path): The path to the input MKV file.
+    """
+    _fadvise(mkv_file_path, getattr(os, "POSIX_FADV_WILLNEED", 0))
+
+
+async def probe_subtitles(mkv_file_path: Path):
+    """
+    Finds the subtitle streams of a given MKV file, reusing a cached probe
+    when the file hasn't changed since the last run.
+
+    Args:
+        mkv_file_path (Path): The path to the input MKV file.
+
+    Returns:
+        list[dict] | None: The subtitle streams, or None if there is nothing to extract.
     """
     if not mkv_file_path.is_file():
         print(f"Error: File not found at '{mkv_file_path}'")
-        return
+        return None
 
     print(f"Processing file: {mkv_file_path.name}")
 
-    # 1. Use ffprobe to get subtitle stream information in JSON format
+    # Use ffprobe to get subtitle stream information as CSV rows
     ffprobe_command = [
-        "ffprobe",
+        FFPROBE,
         "-v", "error",
         "-select_streams", "s",
         "-show_entries", "stream=index,codec_name:stream_tags=language",
-        "-of", "json",
+        "-of", "csv=p=0",
         str(mkv_file_path)
     ]
 
+    # The cache is read on a worker thread, off the event loop
+    loop = asyncio.get_running_loop()
+    try:
+        # Reuse the probe from a previous run if the file hasn't changed
+        cached_output = await loop.run_in_executor(None, _cache_lookup, mkv_file_path)
+        subtitle_streams = _parse_streams(cached_output) if cached_output is not None else None
+    except (OSError, ValueError):
+        subtitle_streams = None
+
+    if subtitle_streams is None:
+        process = await asyncio.create_subprocess_exec(
+            *ffprobe_command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            print(f"Error running ffprobe: {stderr.decode(errors='replace')}")
+            return None
+
+        try:
+            subtitle_streams = _parse_streams(stdout)
+        except ValueError:
+            print("Error: Could not parse ffprobe output. No subtitle streams found or file is invalid.")
+            return None
+
+        try:
+            _cache_stage(mkv_file_path, stdout)
+        except OSError:
+            pass  # Caching is best-effort
+
+    if not subtitle_streams:
+        print(f"No subtitle streams found in {mkv_file_path.name}.")
+        return None
+
+    print(f"Found {len(subtitle_streams)} subtitle stream(s) in {mkv_file_path.name}.")
+    return subtitle_streams
+
+
+def _track_specs(mkv_file_path: Path, subtitle_streams: list) -> list:
+    """
+    Precomputes everything needed to extract each subtitle stream.
+    Bitmap streams are skipped, since they can't be converted to WebVTT.
+
+    Args:
+        mkv_file_path (Path): The path to the input MKV file.
+        subtitle_streams (list[dict]): The streams reported by ffprobe.
+
+    Returns:
+        list[tuple[int, str, str, Path]]: (index, codec_name, lang_code, output_filename) per stream.
+    """
+    base_filename = mkv_file_path.stem
+    parent = mkv_file_path.parent
+    # Get language tag, default to 'und' (undetermined) if not present
+    specs = [(s['index'], s.get('codec_name', 'unknown'), s.get('language', 'und')) for s in subtitle_streams]
+    for index, codec_name, lang_code in specs:
+        if codec_name in IMAGE_SUBTITLE_CODECS:
+            print(f"  -> Skipping track {index} ({lang_code}, {codec_name}): bitmap subtitles can't be converted to WebVTT")
+    return [
+        (index, codec_name, lang_code, parent / f"{base_filename}_sub_{lang_code}_{index}.vtt")
+        for index, codec_name, lang_code in specs
+        if codec_name not in IMAGE_SUBTITLE_CODECS
+    ]
+
+
+def _node_affinity(worker_slot: int):
+    """
+    Returns a preexec_fn that confines ffmpeg to the CPUs of one NUMA node,
+    chosen by its worker slot, so every thread it starts stays node-local.
+    None on single-node machines, or when there's no slot to go by.
+    """
+    if worker_slot is None or len(NUMA_CPU_SETS) < 2:
+        return None
+    cpus = NUMA_CPU_SETS[worker_slot % len(NUMA_CPU_SETS)]
+    return lambda: os.sched_setaffinity(0, cpus)
+
+
+async def _run_ffmpeg(jobs, worker_slot: int = None) -> bool:
+    """
+    Extracts the subtitles of one or more files with a single ffmpeg process.
+    Each file becomes one input, and every subtitle stream one output group,
+    so each file is read once and ffmpeg's startup cost is paid once per batch.
+
+    Args:
+        jobs (list[tuple[Path, list[tuple]]]): Input files with their _track_specs.
+        worker_slot (int): Concurrency slot of the caller, used for NUMA pinning.
+
+    Returns:
+        bool: True if ffmpeg succeeded.
+    """
+    input_args = []
+    output_specs = []
+    for input_number, (mkv_file_path, track_specs) in enumerate(jobs):
+        input_args.append([
+            # One thread per input, since several files are processed at once
+            "-threads", "1",
+            # Stream indexes are already known from ffprobe, so keep
+            # ffmpeg's own stream analysis to a minimum
+            "-probesize", "5000000",
+            "-analyzeduration", "1000000",
+            "-i", str(mkv_file_path)
+        ])
+        for stream_index, codec_name, _, output_filename in track_specs:
+            output_specs.append([
+                "-map", f"{input_number}:{stream_index}",
+                "-c:s", "copy" if codec_name in COPYABLE_SUBTITLE_CODECS else "webvtt",
+                "-y",  # Overwrite output file if it exists
+                str(output_filename)
+            ])
+
+    ffmpeg_command = [
+        *FFMPEG_PRIORITY_PREFIX,
+        FFMPEG,
+        "-hide_banner",
+        "-nostdin",
+        "-loglevel", "error",
+        "-nostats",
+        *itertools.chain(*input_args),
+        *itertools.chain(*output_specs)
+    ]
+
+    # Readahead runs on background threads alongside ffmpeg
+    loop = asyncio.get_running_loop()
+    prefetches = [loop.run_in_executor(None, _prefetch, mkv_file_path) for mkv_file_path, _ in jobs]
+
+    # With -loglevel error ffmpeg stays quiet unless something goes wrong,
+    # so only stderr is captured, to report the failure
+    process = await asyncio.create_subprocess_exec(
+        *ffmpeg_command,
+        stderr=subprocess.PIPE,
+        preexec_fn=_node_affinity(worker_slot)
+    )
+    _, stderr = await process.communicate()
+    returncode = process.returncode
+
+    if returncode != 0 and stderr:
+        print(f"     ffmpeg: {stderr.decode(errors='replace').strip()}")
+
+    # Readahead is only a hint, so its errors are ignored
+    await asyncio.gather(*prefetches, return_exceptions=True)
+
+    return returncode == 0
+
+
+def _is_written(output_filename: Path) -> bool:
+    """Whether an output file exists and isn't empty."""
     try:
-        result = subprocess.run(ffprobe_command, capture_output=True, text=True, check=True)
-        stream_data = json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running ffprobe: {e.stderr}")
+        return output_filename.stat().st_size > 0
+    except OSError:
+        return False
+
+
+async def _extract_tracks_separately(job, worker_slot: int = None):
+    """
+    Retries a file whose ffmpeg run failed with one run per track, so a
+    track ffmpeg can't handle only costs its own output.
+
+    Args:
+        job (tuple[Path, list[tuple]]): The input file with its _track_specs.
+        worker_slot (int): Concurrency slot of the caller, used for NUMA pinning.
+    """
+    mkv_file_path, track_specs = job
+    track_specs = [spec for spec in track_specs if not _is_written(spec[3])]
+    if not track_specs:
         return
-    except json.JSONDecodeError:
-        print("Error: Could not parse ffprobe output. No subtitle streams found or file is invalid.")
+    if len(track_specs) == 1:
+        print(f"     Error extracting track {track_specs[0][0]} from {mkv_file_path.name}")
         return
 
-    subtitle_streams = stream_data.get("streams", [])
+    print(f"     Extraction failed for {mkv_file_path.name}, retrying tracks one at a time")
+    for track_spec in track_specs:
+        if not await _run_ffmpeg([(mkv_file_path, [track_spec])], worker_slot):
+            print(f"     Error extracting track {track_spec[0]} from {mkv_file_path.name}")
 
-    if not subtitle_streams:
-        print("No subtitle streams found in this file.")
+
+async def extract_batch(mkv_file_paths, worker_slot: int = None):
+    """
+    Extracts all subtitle tracks from several MKV files and saves them as
+    separate WebVTT (.vtt) files, using one ffmpeg process for the whole batch.
+    If the batched run fails, each file it didn't finish is retried on its own,
+    and one that still fails track by track, so one broken track doesn't cost
+    the others.
+
+    Args:
+        mkv_file_paths (list[Path]): The paths to the input MKV files.
+        worker_slot (int): Concurrency slot of the caller, used for NUMA pinning.
+    """
+    probes = await asyncio.gather(*(probe_subtitles(path) for path in mkv_file_paths))
+    jobs = [(path, _track_specs(path, streams)) for path, streams in zip(mkv_file_paths, probes) if streams]
+    jobs = [(path, track_specs) for path, track_specs in jobs if track_specs]
+
+    if not jobs:
         return
 
-    print(f"Found {len(subtitle_streams)} subtitle stream(s).")
+    for _, track_specs in jobs:
+        for stream_index, codec_name, lang_code, output_filename in track_specs:
+            print(f"  -> Extracting track {stream_index} ({lang_code}, {codec_name}) -> {output_filename.name}")
+
+    # Outputs left by an earlier run are cleared first, so after a failure
+    # the ones that exist are this run's
+    for _, track_specs in jobs:
+        for *_, output_filename in track_specs:
+            output_filename.unlink(missing_ok=True)
+
+    if not await _run_ffmpeg(jobs, worker_slot):
+        # Files whose outputs were all written are done; only the rest are redone
+        failed = [job for job in jobs if not all(_is_written(spec[3]) for spec in job[1])]
+        if len(failed) > 1:
+            print("     Batched extraction failed, retrying unfinished files one at a time")
+            failed = [job for job in failed if not await _run_ffmpeg([job], worker_slot)]
+
+        for job in failed:
+            await _extract_tracks_separately(job, worker_slot)
+
+    for mkv_file_path, _ in jobs:
+        print(f"Extraction complete: {mkv_file_path.name}")
+
+
+async def _save_probes():
+    """Writes the run's new probes to the cache on a worker thread, off the event loop."""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _cache_flush)
+    except (OSError, ValueError):
+        pass  # Caching is best-effort
+
+
+async def extract_subtitles(mkv_file_path: Path):
+    """
+    Extracts all subtitle tracks from a given MKV file and saves them as
+    separate WebVTT (.vtt) files.
 
-    # 2. Loop through each subtitle stream and extract it with ffmpeg
-    for stream in subtitle_streams:
-        stream_index = stream['index']
-        codec_name = stream.get('codec_name', 'unknown')
-        # Get language tag, default to 'und' (undetermined) if not present
-        lang_code = stream.get('tags', {}).get('language', 'und')
+    Args:
+        mkv_file_path (Path): The path to the input MKV file.
+    """
+    await extract_batch([mkv_file_path])
+    await _save_probes()
 
-        # Create a descriptive output filename
-        base_filename = mkv_file_path.stem
-        output_filename = mkv_file_path.parent / f"{base_filename}_sub_{lang_code}_{stream_index}.vtt"
 
-        print(f"  -> Extracting track {stream_index} ({lang_code}, {codec_name}) -> {output_filename.name}")
+async def extract_all(file_paths, max_concurrent: int):
+    """
+    Extracts subtitles from every file, in batches of FFMPEG_BATCH_SIZE files
+    per ffmpeg process, overlapping the batches' ffprobe/ffmpeg runs.
 
-        ffmpeg_command = [
-            "ffmpeg",
-            "-i", str(mkv_file_path),
-            "-map", f"0:{stream_index}",
-            "-c:s", "webvtt",
-            "-y",  # Overwrite output file if it exists
-            str(output_filename)
-        ]
+    Args:
+        file_paths (list[Path]): The input MKV files.
+        max_concurrent (int): Upper bound on batches processed at the same time.
+    """
+    # Each running batch holds one numbered slot, which also picks its NUMA node
+    free_slots = asyncio.Queue()
+    for worker_slot in range(max_concurrent):
+        free_slots.put_nowait(worker_slot)
 
-        # Execute the ffmpeg command
+    async def extract_bounded(batch):
+        worker_slot = await free_slots.get()
         try:
-            # Use DEVNULL to hide ffmpeg's verbose output for a cleaner experience
-            subprocess.run(ffmpeg_command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except subprocess.CalledProcessError as e:
-            print(f"     Error extracting track {stream_index}: {e}")
+            await extract_batch(batch, worker_slot)
+        finally:
+            free_slots.put_nowait(worker_slot)
 
-    print("\nExtraction complete.")
+    batches = [file_paths[i:i + FFMPEG_BATCH_SIZE] for i in range(0, len(file_paths), FFMPEG_BATCH_SIZE)]
+    await asyncio.gather(*(extract_bounded(batch) for batch in batches))
+    await _save_probes()
 
 
 if __name__ == "__main__":
@@ -82,8 +564,9 @@ if __name__ == "__main__":
         print("Usage: python extract_subs.py <path_to_mkv_file>")
         sys.exit(1)
 
-    # Allow processing multiple files
-    for file_arg in sys.argv[1:]:
-        input_file = Path(file_arg)
-        extract_subtitles(input_file)
-        print("-" * 20)
\ No newline at end of file
+    # Allow processing multiple files, grouped by directory so neighbours
+    # are read back-to-back while still in the page cache
+    file_args = sorted(sys.argv[1:], key=lambda arg: str(Path(arg).parent))
+
+    # Files are independent, so process them concurrently
+    asyncio.run(extract_all([Path(arg) for arg in file_args], os.cpu_count() or 1))
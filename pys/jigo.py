@@ -14,18 +14,374 @@ import subprocess
 import argparse
 import shutil
 import time
+import threading
+import hashlib
+import io
+import math
+import tempfile
+import uuid
+import bisect
+import operator
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import re
-from multiprocessing import Pool, cpu_count
-from functools import partial
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial, lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Resolved once at import; a PATH lookup is all check_ffmpeg needs
+_FFMPEG = shutil.which('ffmpeg')
+_FFPROBE = shutil.which('ffprobe')
+
+# Lower rungs are remuxed instead of re-encoded when the source is already at
+# the rung's height and its bitrate is at most this far above the rung's maxrate
+STREAM_COPY_BITRATE_TOLERANCE = 1.25
+
+# Audio renditions are remuxed when the track is already mono/stereo AAC-LC
+# at most this far above the rendition's bitrate
+AUDIO_COPY_BITRATE_TOLERANCE = 1.1
+
+# HLS segment target, and the segment lengths _validate_hls_segments accepts
+HLS_SEGMENT_SECONDS = 6.0
+MIN_SEGMENT_SECONDS = 4.0
+MAX_SEGMENT_SECONDS = 8.0
+
+# A rendition kept from an earlier run must cover the source to within this
+# many seconds; ffmpeg ends the playlist of an interrupted encode too
+RESUME_DURATION_TOLERANCE = 1.0
+
+# A keyframe at every segment boundary: with a fractional frame rate, a GOP
+# counted in frames drifts off the segment grid and segments run long
+_SEGMENT_KEYFRAMES = ('-force_key_frames', f'expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS:g})')
+
+# Stale outputs are unlinked from a thread pool once there are more than this many
+PARALLEL_DELETE_THRESHOLD = 64
+
+# Bitmap subtitle codecs; these can't be converted to WebVTT
+IMAGE_SUBTITLE_CODECS = frozenset({'hdmv_pgs_subtitle', 'dvd_subtitle', 'dvdsub', 'pgssub', 'pgs'})
+
+# Per-track metadata collected by probe_file
+AudioStream = namedtuple('AudioStream', 'index codec channels sample_rate language title bitrate profile')
+SubtitleStream = namedtuple('SubtitleStream', 'index codec language title')
+
+# libx264 tuning for best-quality rungs
+_ADV_X264 = ('-x264-params', 'ref=5:bframes=5:b-adapt=2:direct=auto:me=umh:subme=9:trellis=2:aq-mode=3:aq-strength=0.8')
+
+# x264-style preset names mapped to NVENC presets
+_NVENC_PRESETS = {'slow': 'p7', 'medium': 'p5', 'fast': 'p3'}
+
+# Per-output packet queue while the muxer waits on the other streams of a
+# run; ffmpeg's default aborts multi-output runs whose streams start unevenly
+_MUXING_QUEUE = ('-max_muxing_queue_size', '4096')
+
+# Concurrent NVENC sessions allowed on consumer (GeForce) cards
+CONSUMER_NVENC_SESSIONS = 3
+
+# Source codecs NVDEC decodes; anything else has to be decoded on the CPU
+NVDEC_CODECS = frozenset({'h264', 'hevc', 'av1', 'vp8', 'vp9', 'mpeg1video', 'mpeg2video', 'mpeg4', 'vc1', 'mjpeg'})
+
+# Section separators for console output
+BAR = "=" * 70
+SUB_BAR = "=" * 66
+
+# Summary line per rung, keyed by (stream copied, rung tries stream copy)
+_TIER_SUMMARY = {
+    (True, True): "   • {q:6} {w}x{h} - ⭐ STREAM COPY (100% original)",
+    (False, True): "   • {q:6} {w}x{h} - ⚡ VISUALLY LOSSLESS (CRF 15)",
+    (False, False): "   • {q:6} {w}x{h} @ {bitrate}",
+}
+
+# Sidecar in the output dir recording which rungs a previous run stream-copied,
+# so a resumed run that reuses them still reports and signals them correctly
+RESUME_STATE_FILE = '.hls_resume.json'
+
+# ffprobe/idet results are cached here, keyed by input path + mtime + size
+PROBE_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'hls_converter'
+
+# ffmpeg's encoder and filter lists, reused across runs of the same binary
+FFMPEG_CAPS_FILE = PROBE_CACHE_DIR / 'ffmpeg_capabilities.json'
+
+# idet summary counters, matched against ffmpeg's raw stderr bytes
+_TFF_RE = re.compile(rb'TFF:\s*(\d+)')
+_BFF_RE = re.compile(rb'BFF:\s*(\d+)')
+_PROG_RE = re.compile(rb'Progressive:\s*(\d+)')
+
+# "pts_time,flags" packet rows from ffprobe csv output, keyframes only
+_KEYFRAME_PTS_RE = re.compile(rb'^(-?[\d.]+),K', re.MULTILINE)
+
+# Segment durations in an HLS media playlist
+_EXTINF_RE = re.compile(rb'^#EXTINF:([\d.]+)', re.MULTILINE)
+
+# Characters not allowed in the language part of output file names
+_UNSAFE_LANG_RE = re.compile(r'[^\w\-]')
+
+
+@lru_cache(maxsize=1)
+def _cuda_filters() -> Dict[str, str]:
+    """CUDA filters this ffmpeg was built with, by role: 'scale' and 'yadif'"""
+    try:
+        listing = _ffmpeg_listing('-filters')
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return {}
+
+    names = {fields[1] for fields in map(str.split, listing.splitlines()) if len(fields) > 1}
+    found = {}
+    # scale_npp needs a non-free build; scale_cuda is the common fallback
+    for role, candidates in (('scale', ('scale_npp', 'scale_cuda')), ('yadif', ('yadif_cuda',))):
+        for name in candidates:
+            if name in names:
+                found[role] = name
+                break
+    return found
+
+
+def _tool_cmd(cmd: List[str]) -> List[str]:
+    """cmd with ffmpeg/ffprobe swapped for their absolute paths"""
+    # An absolute executable and close_fds=False let CPython start the tool
+    # with posix_spawn instead of fork+exec; our own fds are non-inheritable
+    path = {'ffmpeg': _FFMPEG, 'ffprobe': _FFPROBE}.get(cmd[0])
+    return [path] + cmd[1:] if path else cmd
+
+
+@lru_cache(maxsize=1)
+def cpu_count() -> int:
+    """CPUs this process may use: its affinity mask (taskset, cpusets), capped by a cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return os.cpu_count() or 1
+
+    # Containers limited with --cpus see every host CPU in their mask but only
+    # get quota/period of them; sizing pools to the mask oversubscribes them
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+@lru_cache(maxsize=1)
+def _pyav():
+    """PyAV, imported on first use (it is slow to load); None if not installed"""
+    try:
+        import av
+    except ImportError:
+        return None
+    return av
+
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, with orjson when it's installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to JSON bytes, with orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def _ffmpeg_listing(flag: str) -> str:
+    """Output of `ffmpeg -hide_banner <flag>`, kept on disk until the ffmpeg binary changes"""
+    key = None
+    cached = {}
+    if _FFMPEG is not None:
+        try:
+            stat = os.stat(_FFMPEG)
+            key = f"{os.path.realpath(_FFMPEG)}:{stat.st_mtime_ns}:{stat.st_size}"
+            with open(FFMPEG_CAPS_FILE, 'rb') as f:
+                cached = _json_loads(f.read())
+        except (OSError, ValueError):
+            pass
+        if not isinstance(cached, dict) or cached.get('key') != key:
+            cached = {'key': key}
+        elif flag in cached:
+            return cached[flag]
+
+    result = subprocess.run(
+        _tool_cmd(['ffmpeg', '-hide_banner', flag]),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=True,
+        close_fds=False
+    )
+
+    if key is not None:
+        cached[flag] = result.stdout
+        try:
+            FFMPEG_CAPS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = FFMPEG_CAPS_FILE.with_name(f"{FFMPEG_CAPS_FILE.name}.{os.getpid()}.tmp")
+            with open(temp_file, 'wb') as f:
+                f.write(_json_dumps(cached))
+            os.replace(temp_file, FFMPEG_CAPS_FILE)
+        except OSError:
+            pass
+    return result.stdout
+
+
+def _ffmpeg_encoders() -> str:
+    """Return the output of `ffmpeg -encoders`"""
+    return _ffmpeg_listing('-encoders')
+
+
+def _rung(name: str, height: Optional[int], video_bitrate: str, maxrate: str,
+          bufsize: str, crf: str, preset: str, use_advanced: bool) -> Dict:
+    """Build one quality profile entry"""
+    return {
+        'name': name,
+        'height': height,
+        'video_bitrate': video_bitrate,
+        'maxrate': maxrate,
+        'bufsize': bufsize,
+        'crf': crf,
+        'preset': preset,
+        'use_advanced': use_advanced,
+    }
+
+
+# Quality ladders keyed by (source bucket, best_quality). The 'high' rung's
+# height is None here and is set to the source height per file.
+_LADDERS = {
+    ('4k', True): {
+        'high': _rung('high', None, '18000k', '20000k', '27000k', '18', 'slow', True),
+        'medium': _rung('medium', 1080, '6000k', '6500k', '9000k', '21', 'slow', True),
+        'low': _rung('low', 480, '1800k', '2000k', '2700k', '23', 'medium', True),
+    },
+    ('4k', False): {
+        'high': _rung('high', None, '16000k', '17000k', '24000k', '20', 'medium', False),
+        'medium': _rung('medium', 1080, '5000k', '5350k', '7500k', '23', 'medium', False),
+        'low': _rung('low', 480, '1400k', '1500k', '2100k', '26', 'fast', False),
+    },
+}
+
+for _bucket, _best, _high in [
+    ('1080', True, ('6000k', '6500k', '9000k', '19', 'slow')),
+    ('1080', False, ('5000k', '5350k', '7500k', '21', 'medium')),
+    ('720', True, ('3500k', '3800k', '5200k', '20', 'slow')),
+    ('720', False, ('2800k', '3000k', '4200k', '22', 'medium')),
+    ('sub720', True, ('1800k', '2000k', '2700k', '21', 'medium')),
+    ('sub720', False, ('1400k', '1500k', '2100k', '23', 'fast')),
+]:
+    if _best:
+        _LADDERS[(_bucket, _best)] = {
+            'high': _rung('high', None, *_high, True),
+            'medium': _rung('medium', 720, '3500k', '3800k', '5200k', '21', 'slow', True),
+            'low': _rung('low', 480, '1800k', '2000k', '2700k', '23', 'medium', True),
+        }
+    else:
+        _LADDERS[(_bucket, _best)] = {
+            'high': _rung('high', None, *_high, False),
+            'medium': _rung('medium', 720, '2800k', '3000k', '4200k', '23', 'medium', False),
+            'low': _rung('low', 480, '1400k', '1500k', '2100k', '26', 'fast', False),
+        }
+
+
+def _ladder_bucket(source_height: int) -> str:
+    """Map a source height to its _LADDERS bucket"""
+    if source_height >= 2160:
+        return '4k'
+    if source_height >= 1080:
+        return '1080'
+    if source_height >= 720:
+        return '720'
+    return 'sub720'
+
+
+@lru_cache(maxsize=None)
+def _safe_lang(language: str) -> str:
+    """Language tag made safe for file names (a file has only a handful of distinct tags)"""
+    return _UNSAFE_LANG_RE.sub('_', language)
+
+
+@lru_cache(maxsize=256)
+def _scale_dims(source_width: int, source_height: int, target_height: int) -> Tuple[str, int, int]:
+    """(scale filter value, width, height) for a rung, keeping the source aspect ratio"""
+    if target_height >= source_height:
+        target_height = source_height
+        target_width = source_width
+    else:
+        aspect_ratio = source_width / source_height
+        target_width = int(target_height * aspect_ratio)
+
+    # yuv420p needs even dimensions
+    target_width &= ~1
+    target_height &= ~1
+
+    return f"{target_width}:{target_height}", target_width, target_height
+
+
+class _ThreadRoutedStdout:
+    """sys.stdout stand-in that holds back what threads named <prefix>* print"""
+
+    def __init__(self, stream, prefix: str):
+        self.stream = stream
+        self.prefix = prefix
+        self.held = io.StringIO()
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        if threading.current_thread().name.startswith(self.prefix):
+            with self._lock:
+                return self.held.write(text)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _ThreadBufferedStdout:
+    """sys.stdout stand-in that buffers a thread's output between hold() and release()"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def hold(self):
+        self._local.buffer = io.StringIO()
+
+    def release(self):
+        text = self._local.buffer.getvalue()
+        self._local.buffer = None
+        with self._lock:
+            self.stream.write(text)
+            self.stream.flush()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        with self._lock:
+            return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 
 class HLSConverter:
     def __init__(self, input_file: str, output_dir: str, best_quality: bool = False,
                  explicit_qualities: List[str] = None, hw_accel: Optional[str] = None,
                  parallel: bool = False, force_reencode: bool = False,
                  dry_run: bool = False, overwrite: bool = False,
-                 no_interlace_check: bool = False):
+                 no_interlace_check: bool = False, assume_yes: bool = False,
+                 on_existing: Optional[str] = None, allow_hdr: bool = False,
+                 no_pipeline: bool = False, tmp_encode: bool = False,
+                 max_parallel: Optional[int] = None, single_input: bool = False,
+                 segment_type: str = 'fmp4'):
         self.input_file = input_file
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -36,6 +392,18 @@ class HLSConverter:
         self.dry_run = dry_run
         self.overwrite = overwrite
         self.no_interlace_check = no_interlace_check
+        self.assume_yes = assume_yes
+        self.on_existing = on_existing or ('overwrite' if overwrite else None)
+        self.allow_hdr = allow_hdr
+        self.no_pipeline = no_pipeline
+        self.tmp_encode = tmp_encode
+        # Cap on ffmpeg processes one conversion runs at once; the video,
+        # audio and subtitle pools each size themselves to it, and all of them
+        # share _process_slots so that together they never run more
+        self.max_parallel = max(1, max_parallel or cpu_count())
+        self._process_slots = threading.BoundedSemaphore(self.max_parallel)
+        self.single_input = single_input
+        self.segment_type = segment_type
 
         # Determine which qualities to generate
         if explicit_qualities:
@@ -63,28 +431,50 @@ class HLSConverter:
         self.video_info = None
         self.audio_streams = []
         self.subtitle_streams = []
+        # (position in subtitle_streams, stream) pairs, split by whether WebVTT can hold them
+        self.text_subtitle_streams = []
+        self.image_subtitle_streams = []
         self.converted_subtitles = []
         self.source_is_h264 = False
         self.can_copy_video = False
-        self.stream_copy_used = False
+        self.gop_fits_segments = None
+        self._keyframe_cache = {}
+        # Encodes running under _run_ffmpeg_with_progress, so a failed rung can stop the others
+        self._active_processes = set()
+        # Other ffmpegs (audio, subtitles), and whether Ctrl-C has stopped them all
+        self._tool_processes = set()
+        self._stop_requested = threading.Event()
+        # Per-thread state of a rung encoded under --parallel: its CPU set, and
+        # whether its output is buffered (live progress is then left out)
+        self._rung_state = threading.local()
+        self._path_cache = {}
+        self._input_cmd_cache = {}
+        self.copied_qualities = set()
         self.start_time = None
         self.is_interlaced = False
+        self._probe_data = None
+        self._interlace_result = None
+        self._idet_stderr = None
+        # get_encoder_settings results, keyed by the profile values they depend on
+        self._encoder_settings_cache = {}
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _tools_available() -> bool:
+        """Check PATH for ffmpeg and ffprobe (once per process)"""
+        return _FFMPEG is not None and _FFPROBE is not None
 
     def check_ffmpeg(self) -> bool:
         """Check if ffmpeg and ffprobe are available"""
-        try:
-            subprocess.run(['ffmpeg', '-version'],
-                         stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE,
-                         check=True)
-            subprocess.run(['ffprobe', '-version'],
-                         stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE,
-                         check=True)
+        if self._tools_available():
             return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print("❌ ERROR: ffmpeg and ffprobe must be installed and in PATH")
-            return False
+
+        print("❌ ERROR: ffmpeg and ffprobe must be installed and in PATH")
+        return False
+
+    def _can_prompt(self) -> bool:
+        """Only ask questions when a user is actually there to answer"""
+        return sys.stdin.isatty() and not self.assume_yes
 
     def check_disk_space(self, estimated_gb: float = 10.0) -> bool:
         """Check if enough disk space available"""
@@ -98,12 +488,17 @@ class HLSConverter:
 
             if free_gb < estimated_gb:
                 print(f"   ⚠️  WARNING: Low disk space!")
-                if not self.dry_run:
+                if self.dry_run:
+                    print(f"   [DRY RUN] Would ask user to continue")
+                    return True
+                if self._can_prompt():
                     response = input("   Continue anyway? (y/n): ")
                     return response.lower() == 'y'
-                else:
-                    print(f"   [DRY RUN] Would ask user to continue")
+                if self.assume_yes:
+                    print(f"   Continuing (--assume-yes)")
                     return True
+                print(f"   Not a terminal: stopping (use --assume-yes to continue)")
+                return False
 
             print(f"   ✅ Sufficient space available")
             return True
@@ -112,46 +507,115 @@ class HLSConverter:
             print(f"⚠️  Could not check disk space: {e}")
             return True
 
+    def _start_staging(self) -> Optional[Path]:
+        """Create a RAM-backed staging dir for the run, if /dev/shm has room for it"""
+        shm = Path('/dev/shm')
+        if not os.path.ismount(shm):
+            return None
+
+        try:
+            if shutil.disk_usage(shm).free / (1024**3) < self.estimate_output_size():
+                print(f"   ⚠️  Not enough room in {shm} - writing straight to {self.output_dir}")
+                return None
+            staging = shm / f"hls_{uuid.uuid4().hex}"
+            staging.mkdir()
+        except OSError:
+            return None
+
+        print(f"\n💨 Staging output in {staging}")
+        return staging
+
+    def _publish_staging(self, staging: Path):
+        """Move everything written to the staging dir into the output dir"""
+        print(f"\n📦 Moving output from {staging} to {self.output_dir}...")
+        with os.scandir(staging) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    shutil.move(entry.path, os.path.join(self.output_dir, entry.name))
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def _discard_staging(self, staging: Path):
+        """Delete the staging dir of a run that didn't finish, leaving the output dir untouched"""
+        print(f"\n🗑️  Conversion did not finish; discarding staged output in {staging}")
+        shutil.rmtree(staging, ignore_errors=True)
+
     def estimate_output_size(self) -> float:
-        """Estimate output size in GB"""
+        """Estimate output size in GB from rung bitrates and the probed duration"""
         try:
-            source_size_gb = os.path.getsize(self.input_file) / (1024**3)
-
-            num_qualities = len(self.enabled_qualities)
-            num_audio = max(len(self.audio_streams), 1)
-
-            # Estimate based on stream copy possibility
-            if self.can_copy_video and 'high' in self.enabled_qualities:
-                estimated = source_size_gb * 1.2
-                if 'medium' in self.enabled_qualities:
-                    estimated += source_size_gb * 0.4
-                if 'low' in self.enabled_qualities:
-                    estimated += source_size_gb * 0.15
-            else:
-                estimated = source_size_gb * num_qualities * 0.6
+            duration = float(self._probe_once()['format']['duration'])
 
-            estimated += (num_audio * num_qualities * 0.1)
-            estimated *= 1.2  # Safety margin
+            # Copied rungs carry the source bitrate; encoded ones are capped at maxrate
+            video_bps = 0
+            for quality in self.enabled_qualities:
+                profile = self.quality_profiles[quality]
+                bitrate = int(profile['maxrate'].replace('k', '000'))
+                if profile.get('stream_copy'):
+                    try:
+                        bitrate = int(self.video_info['bitrate'])
+                    except (TypeError, ValueError):
+                        pass
+                video_bps += bitrate
 
-            return max(estimated, 2.0)
+            audio_bps = sum(int(self.audio_profiles[q]['bitrate'].replace('k', '000'))
+                            for q in self.enabled_qualities) * len(self.audio_streams)
 
-        except:
+            estimated = (video_bps + audio_bps) * duration / 8 / (1024**3)
+            estimated *= 1.05  # container overhead
+
+            return estimated
+
+        except (KeyError, TypeError, ValueError):
             return 10.0
 
+    def _delete_output_files(self, names: List[str]):
+        """Delete files in the output directory by name"""
+        if os.unlink in os.supports_dir_fd:
+            dir_fd = os.open(self.output_dir, os.O_RDONLY)
+            unlink = partial(os.unlink, dir_fd=dir_fd)
+        else:
+            dir_fd = None
+            unlink = lambda name: os.unlink(os.path.join(self.output_dir, name))
+
+        try:
+            # unlink is syscall-latency bound, so large segment sets go wide
+            if len(names) > PARALLEL_DELETE_THRESHOLD:
+                with ThreadPoolExecutor(max_workers=32) as pool:
+                    list(pool.map(unlink, names))
+            else:
+                for name in names:
+                    unlink(name)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
     def check_existing_files(self) -> bool:
         """Check if output directory has existing files"""
         if not self.output_dir.exists():
             return True
 
-        existing_files = list(self.output_dir.glob('*.m3u8')) + list(self.output_dir.glob('*.ts'))
+        with os.scandir(self.output_dir) as entries:
+            existing_files = [entry.name for entry in entries
+                              if entry.name.endswith(('.m3u8', '.ts', '.mp4')) and entry.is_file()]
 
         if existing_files:
-            if self.overwrite:
+            on_existing = self.on_existing
+            if on_existing is None and not self.dry_run and not self._can_prompt():
+                on_existing = 'overwrite' if self.assume_yes else 'abort'
+
+            if on_existing == 'skip':
+                print(f"\n⚠️  Found {len(existing_files)} existing HLS files - keeping them")
+                return True
+
+            if on_existing == 'abort':
+                print(f"\n⚠️  Output directory contains {len(existing_files)} existing files")
+                print(f"   Use --on-existing=overwrite or --on-existing=skip to continue")
+                return False
+
+            if on_existing == 'overwrite':
                 print(f"\n⚠️  Found {len(existing_files)} existing HLS files")
                 if not self.dry_run:
                     print(f"   Deleting existing files...")
-                    for f in existing_files:
-                        f.unlink()
+                    self._delete_output_files(existing_files)
                 else:
                     print(f"   [DRY RUN] Would delete existing files")
                 return True
@@ -170,8 +634,7 @@ class HLSConverter:
                 response = input("\n   Choice (1-2): ").strip()
                 if response == '1':
                     print(f"   🗑️  Deleting existing files...")
-                    for f in existing_files:
-                        f.unlink()
+                    self._delete_output_files(existing_files)
                     return True
                 elif response == '2':
                     return False
@@ -181,30 +644,77 @@ class HLSConverter:
         return True
 
     def detect_interlaced(self) -> bool:
-        """Detect if video is interlaced"""
+        """Detect if video is interlaced (idet runs at most once per input)"""
         if self.no_interlace_check:
             return False
 
-        print(f"\n🔍 Checking for interlaced content...")
+        if self._interlace_result is None:
+            self._interlace_result = self._run_idet()
+            self._save_probe_cache()
+
+        return self._interlace_result
+
+    def _idet_output(self) -> bytes:
+        """Run the idet sample once and keep ffmpeg's stderr for parsing"""
+        if self._idet_stderr is None:
+            # Sample away from intros/logos; -ss before -i is a fast keyframe seek
+            duration = float(self._probe_once().get('format', {}).get('duration', 0) or 0)
 
-        try:
             cmd = [
                 'ffmpeg',
+                '-hwaccel', 'auto',
+                '-ss', f"{duration * 0.4:.3f}",
                 '-i', self.input_file,
                 '-vf', 'idet',
-                '-frames:v', '200',
+                '-frames:v', '100',
                 '-an',
+                '-nostats',
                 '-f', 'null',
                 '-'
             ]
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            output = result.stderr
+            started = time.monotonic()
+            process = subprocess.Popen(_tool_cmd(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                       close_fds=False)
+            watchdog = threading.Timer(30, process.kill)
+            watchdog.start()
+
+            stderr_lines = []
+            try:
+                for line in iter(process.stderr.readline, b''):
+                    stderr_lines.append(line)
+                    # The multi-frame summary is idet's last line - no need
+                    # to wait for ffmpeg to tear down
+                    if b'Multi frame detection' in line:
+                        process.terminate()
+                        break
+            finally:
+                watchdog.cancel()
+                process.stderr.close()
+                process.wait()
+
+            output = b''.join(stderr_lines)
+            if b'Multi frame detection' not in output and time.monotonic() - started >= 30:
+                raise subprocess.TimeoutExpired(cmd, 30)
+
+            self._idet_stderr = output
+
+        return self._idet_stderr
+
+    def _run_idet(self) -> bool:
+        """Run ffmpeg's idet filter on a sample from the middle of the video"""
+        print(f"\n🔍 Checking for interlaced content...")
+
+        try:
+            output = self._idet_output()
 
-            if 'Multi frame detection' in output:
-                tff = int(re.search(r'TFF:\s*(\d+)', output).group(1)) if 'TFF:' in output else 0
-                bff = int(re.search(r'BFF:\s*(\d+)', output).group(1)) if 'BFF:' in output else 0
-                progressive = int(re.search(r'Progressive:\s*(\d+)', output).group(1)) if 'Progressive:' in output else 0
+            if b'Multi frame detection' in output:
+                tff_match = _TFF_RE.search(output)
+                bff_match = _BFF_RE.search(output)
+                prog_match = _PROG_RE.search(output)
+                tff = int(tff_match.group(1) if tff_match else b'0')
+                bff = int(bff_match.group(1) if bff_match else b'0')
+                progressive = int(prog_match.group(1) if prog_match else b'0')
 
                 total_interlaced = tff + bff
                 total_frames = total_interlaced + progressive
@@ -229,20 +739,11 @@ class HLSConverter:
     def detect_hdr(self) -> bool:
         """Detect HDR content and warn user. Returns True if user wants to abort."""
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=color_transfer,color_primaries,color_space',
-                '-of', 'json',
-                self.input_file
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
+            data = self._probe_once()
+            video_streams = [s for s in data.get('streams', []) if s.get('codec_type') == 'video']
 
-            if 'streams' in data and len(data['streams']) > 0:
-                stream = data['streams'][0]
+            if video_streams:
+                stream = video_streams[0]
                 color_transfer = stream.get('color_transfer', '').lower()
                 color_primaries = stream.get('color_primaries', '').lower()
 
@@ -253,9 +754,9 @@ class HLSConverter:
                          any(hdr in color_primaries for hdr in hdr_primaries)
 
                 if is_hdr:
-                    print(f"\n{'='*70}")
+                    print(f"\n{BAR}")
                     print(f"⚠️  HDR CONTENT DETECTED!")
-                    print(f"{'='*70}")
+                    print(BAR)
                     print(f"Color Transfer: {color_transfer}")
                     print(f"Color Primaries: {color_primaries}")
                     print(f"\n❌ IMPORTANT: H.264 does not support HDR!")
@@ -266,14 +767,26 @@ class HLSConverter:
                     print(f"   • For HDR preservation: Use HEVC with DASH (not HLS)")
                     print(f"   • For web compatibility: Continue with SDR conversion")
                     print(f"   • For best quality: Use tone mapping (external tool)")
-                    print(f"{'='*70}\n")
+                    print(f"{BAR}\n")
+
+                    if self.allow_hdr:
+                        print(f"Continuing with HDR → SDR conversion (--allow-hdr)")
+                        return False
 
                     if self.dry_run:
                         print(f"[DRY RUN] Would ask user to continue")
                         return False
 
-                    response = input("Continue with HDR → SDR conversion? (y/n): ")
-                    return response.lower() != 'y'
+                    if self._can_prompt():
+                        response = input("Continue with HDR → SDR conversion? (y/n): ")
+                        return response.lower() != 'y'
+
+                    if self.assume_yes:
+                        print(f"Continuing with HDR → SDR conversion (--assume-yes)")
+                        return False
+
+                    print(f"Not a terminal: stopping (use --allow-hdr to continue)")
+                    return True
 
             return False
 
@@ -281,6 +794,10 @@ class HLSConverter:
             print(f"⚠️  Could not detect HDR: {e}")
             return False
 
+    def _list_encoders(self) -> str:
+        """Return the output of `ffmpeg -encoders` (shared across instances)"""
+        return _ffmpeg_encoders()
+
     def detect_hardware_acceleration(self) -> Optional[str]:
         """Auto-detect available hardware acceleration"""
         print("\n🔍 Detecting hardware acceleration...")
@@ -294,16 +811,11 @@ class HLSConverter:
         }
 
         try:
-            result = subprocess.run(
-                ['ffmpeg', '-hide_banner', '-encoders'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            encoders_output = self._list_encoders()
 
             available = []
             for name, encoder in hw_encoders.items():
-                if encoder in result.stdout:
+                if encoder in encoders_output:
                     available.append(name)
                     print(f"   ✓ Found: {name.upper()} ({encoder})")
 
@@ -323,34 +835,43 @@ class HLSConverter:
             print(f"   ⚠️  Could not detect hardware acceleration")
             return None
 
+    @staticmethod
+    def _nvidia_gpu_name() -> str:
+        """Query the NVIDIA GPU model name via nvidia-smi"""
+        result = subprocess.run(
+            ['nvidia-smi', '--query-gpu=name', '--format=csv,noheader'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=2
+        )
+        return result.stdout.strip()
+
+    @staticmethod
+    def _is_workstation_gpu(gpu_name: str) -> bool:
+        """Check if an NVIDIA GPU is a workstation card (no NVENC session cap)"""
+        return any(x in gpu_name.lower() for x in [
+            'quadro', 'tesla', 'rtx a', 'a100', 'a40', 'a6000', 'a5000', 'a4000',
+            'a2000', 't4', 't1000', 'p4000', 'p2000'
+        ])
+
     def _check_parallel_efficiency(self):
         """Warn if parallel processing won't help"""
         if self.hw_accel == 'nvenc':
             try:
-                result = subprocess.run(
-                    ['nvidia-smi', '--query-gpu=name', '--format=csv,noheader'],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                gpu_name = result.stdout.strip().lower()
-
-                is_workstation = any(x in gpu_name for x in [
-                    'quadro', 'tesla', 'rtx a', 'a100', 'a40', 'a6000', 'a5000', 'a4000',
-                    'a2000', 't4', 't1000', 'p4000', 'p2000'
-                ])
+                gpu_name = self._nvidia_gpu_name()
 
-                if is_workstation:
-                    print(f"\n✅ NVIDIA Workstation GPU: {result.stdout.strip()}")
+                if self._is_workstation_gpu(gpu_name):
+                    print(f"\n✅ NVIDIA Workstation GPU: {gpu_name}")
                     print(f"   Parallel encoding fully supported\n")
                 elif len(self.enabled_qualities) > 2:
-                    print(f"\n{'='*70}")
+                    print(f"\n{BAR}")
                     print(f"⚠️  PERFORMANCE NOTICE: NVIDIA GeForce GPU")
-                    print(f"{'='*70}")
-                    print(f"GPU: {result.stdout.strip()}")
+                    print(BAR)
+                    print(f"GPU: {gpu_name}")
                     print(f"\nGeForce limits concurrent NVENC sessions to 2-3.")
                     print(f"With {len(self.enabled_qualities)} qualities, encoding will be partially sequential.")
-                    print(f"{'='*70}\n")
+                    print(f"{BAR}\n")
 
             except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
                 if len(self.enabled_qualities) > 2:
@@ -384,8 +905,51 @@ class HLSConverter:
 
         return True
 
+    def _copy_eligibility(self, profile_name: str, profile: Dict) -> bool:
+        """Check if a quality rung can be stream copied from the source"""
+        if self.force_reencode or not self.source_is_h264:
+            return False
+
+        if profile_name == 'high':
+            return True
+
+        if profile['height'] != self.video_info['height']:
+            return False
+
+        try:
+            source_bitrate = int(self.video_info['bitrate'])
+        except (TypeError, ValueError):
+            return False
+
+        maxrate = int(profile['maxrate'].replace('k', '000'))
+        return source_bitrate <= maxrate * STREAM_COPY_BITRATE_TOLERANCE
+
+    def _relax_transcoded_rungs(self):
+        """Use the medium preset for transcoded rungs when 'high' is a stream copy"""
+        if 'high' not in self.enabled_qualities or not self.quality_profiles['high'].get('stream_copy'):
+            return
+
+        # The copied rung already carries the original quality; slow buys the
+        # lower rungs only a few percent of bitrate for ~2x the encode time
+        for quality in self.enabled_qualities:
+            profile = self.quality_profiles[quality]
+            if not profile.get('stream_copy') and profile['preset'] == 'slow':
+                profile['preset'] = 'medium'
+                profile['crf'] = str(int(profile['crf']) + 1)
+                print(f"   ⚡ {quality}: preset slow → medium, CRF {profile['crf']} ('high' is a stream copy)")
+
     def get_encoder_settings(self, profile: Dict) -> Tuple[str, List[str]]:
-        """Get encoder and settings based on hardware acceleration"""
+        """Get encoder and settings based on hardware acceleration, built once per distinct rung"""
+        key = (self.hw_accel, profile['preset'], profile['crf'], profile.get('video_bitrate'),
+               profile.get('maxrate'), profile.get('bufsize'), profile.get('use_advanced', False))
+        cached = self._encoder_settings_cache.get(key)
+        if cached is None:
+            encoder_name, settings = self._build_encoder_settings(profile)
+            cached = self._encoder_settings_cache[key] = (encoder_name, tuple(settings))
+        return cached[0], list(cached[1])
+
+    def _build_encoder_settings(self, profile: Dict) -> Tuple[str, List[str]]:
+        """Assemble the encoder argv for a profile; use get_encoder_settings, which caches it"""
         if not self.hw_accel:
             encoder = 'libx264'
             settings = [
@@ -397,20 +961,17 @@ class HLSConverter:
             ]
 
             if profile.get('use_advanced', False):
-                settings.extend([
-                    '-x264-params',
-                    'ref=5:bframes=5:b-adapt=2:direct=auto:me=umh:subme=9:trellis=2:aq-mode=3:aq-strength=0.8'
-                ])
+                settings.extend(_ADV_X264)
 
             return 'libx264', settings
 
         if self.hw_accel == 'nvenc':
-            preset_map = {'slow': 'p7', 'medium': 'p5', 'fast': 'p3'}
-            nvenc_preset = preset_map.get(profile['preset'], 'p5')
+            nvenc_preset = _NVENC_PRESETS.get(profile['preset'], 'p5')
 
             settings = [
                 '-c:v', 'h264_nvenc',
                 '-preset', nvenc_preset,
+                '-tune', 'hq',
                 '-profile:v', 'high',
                 '-level', '4.1',
                 '-rc:v', 'vbr',
@@ -420,6 +981,7 @@ class HLSConverter:
                 '-bufsize:v', profile['bufsize'],
                 '-spatial_aq', '1',
                 '-temporal_aq', '1',
+                '-forced-idr', '1',
             ]
             return 'h264_nvenc', settings
 
@@ -484,171 +1046,20 @@ class HLSConverter:
 
         print(f"\n🎯 Determining quality ladder for {source_height}p source...")
 
-        if source_height >= 2160:
-            if self.best_quality:
-                self.quality_profiles = {
-                    'high': {
-                        'name': 'high',
-                        'height': source_height,
-                        'video_bitrate': '18000k',
-                        'maxrate': '20000k',
-                        'bufsize': '27000k',
-                        'crf': '18',
-                        'preset': 'slow',
-                        'use_advanced': True,
-                    },
-                    'medium': {
-                        'name': 'medium',
-                        'height': 1080,
-                        'video_bitrate': '6000k',
-                        'maxrate': '6500k',
-                        'bufsize': '9000k',
-                        'crf': '21',
-                        'preset': 'slow',
-                        'use_advanced': True,
-                    },
-                    'low': {
-                        'name': 'low',
-                        'height': 480,
-                        'video_bitrate': '1800k',
-                        'maxrate': '2000k',
-                        'bufsize': '2700k',
-                        'crf': '23',
-                        'preset': 'medium',
-                        'use_advanced': True,
-                    },
-                }
-                print(f"   📊 4K Quality Ladder: {source_height}p → 1080p → 480p")
-                print(f"   ⚙️  Encoding Mode: ⭐ MAXIMUM QUALITY")
-            else:
-                self.quality_profiles = {
-                    'high': {
-                        'name': 'high',
-                        'height': source_height,
-                        'video_bitrate': '16000k',
-                        'maxrate': '17000k',
-                        'bufsize': '24000k',
-                        'crf': '20',
-                        'preset': 'medium',
-                        'use_advanced': False,
-                    },
-                    'medium': {
-                        'name': 'medium',
-                        'height': 1080,
-                        'video_bitrate': '5000k',
-                        'maxrate': '5350k',
-                        'bufsize': '7500k',
-                        'crf': '23',
-                        'preset': 'medium',
-                        'use_advanced': False,
-                    },
-                    'low': {
-                        'name': 'low',
-                        'height': 480,
-                        'video_bitrate': '1400k',
-                        'maxrate': '1500k',
-                        'bufsize': '2100k',
-                        'crf': '26',
-                        'preset': 'fast',
-                        'use_advanced': False,
-                    },
-                }
-                print(f"   📊 4K Quality Ladder: {source_height}p → 1080p → 480p")
-                print(f"   ⚙️  Encoding Mode: ⚡ BALANCED")
+        bucket = _ladder_bucket(source_height)
+        self.quality_profiles = {name: dict(profile)
+                                 for name, profile in _LADDERS[(bucket, self.best_quality)].items()}
+        self.quality_profiles['high']['height'] = source_height
 
+        if bucket == '4k':
+            print(f"   📊 4K Quality Ladder: {source_height}p → 1080p → 480p")
         else:
-            if source_height >= 1080:
-                if self.best_quality:
-                    high_bitrate, high_maxrate, high_bufsize = '6000k', '6500k', '9000k'
-                    high_crf, high_preset = '19', 'slow'
-                else:
-                    high_bitrate, high_maxrate, high_bufsize = '5000k', '5350k', '7500k'
-                    high_crf, high_preset = '21', 'medium'
-            elif source_height >= 720:
-                if self.best_quality:
-                    high_bitrate, high_maxrate, high_bufsize = '3500k', '3800k', '5200k'
-                    high_crf, high_preset = '20', 'slow'
-                else:
-                    high_bitrate, high_maxrate, high_bufsize = '2800k', '3000k', '4200k'
-                    high_crf, high_preset = '22', 'medium'
-            else:
-                if self.best_quality:
-                    high_bitrate, high_maxrate, high_bufsize = '1800k', '2000k', '2700k'
-                    high_crf, high_preset = '21', 'medium'
-                else:
-                    high_bitrate, high_maxrate, high_bufsize = '1400k', '1500k', '2100k'
-                    high_crf, high_preset = '23', 'fast'
+            print(f"   📊 Quality Ladder: {source_height}p (original) → 720p → 480p")
 
-            if self.best_quality:
-                self.quality_profiles = {
-                    'high': {
-                        'name': 'high',
-                        'height': source_height,
-                        'video_bitrate': high_bitrate,
-                        'maxrate': high_maxrate,
-                        'bufsize': high_bufsize,
-                        'crf': high_crf,
-                        'preset': high_preset,
-                        'use_advanced': True,
-                    },
-                    'medium': {
-                        'name': 'medium',
-                        'height': 720,
-                        'video_bitrate': '3500k',
-                        'maxrate': '3800k',
-                        'bufsize': '5200k',
-                        'crf': '21',
-                        'preset': 'slow',
-                        'use_advanced': True,
-                    },
-                    'low': {
-                        'name': 'low',
-                        'height': 480,
-                        'video_bitrate': '1800k',
-                        'maxrate': '2000k',
-                        'bufsize': '2700k',
-                        'crf': '23',
-                        'preset': 'medium',
-                        'use_advanced': True,
-                    },
-                }
-                print(f"   📊 Quality Ladder: {source_height}p (original) → 720p → 480p")
-                print(f"   ⚙️  Encoding Mode: ⭐ MAXIMUM QUALITY")
-            else:
-                self.quality_profiles = {
-                    'high': {
-                        'name': 'high',
-                        'height': source_height,
-                        'video_bitrate': high_bitrate,
-                        'maxrate': high_maxrate,
-                        'bufsize': high_bufsize,
-                        'crf': high_crf,
-                        'preset': high_preset,
-                        'use_advanced': False,
-                    },
-                    'medium': {
-                        'name': 'medium',
-                        'height': 720,
-                        'video_bitrate': '2800k',
-                        'maxrate': '3000k',
-                        'bufsize': '4200k',
-                        'crf': '23',
-                        'preset': 'medium',
-                        'use_advanced': False,
-                    },
-                    'low': {
-                        'name': 'low',
-                        'height': 480,
-                        'video_bitrate': '1400k',
-                        'maxrate': '1500k',
-                        'bufsize': '2100k',
-                        'crf': '26',
-                        'preset': 'fast',
-                        'use_advanced': False,
-                    },
-                }
-                print(f"   📊 Quality Ladder: {source_height}p (original) → 720p → 480p")
-                print(f"   ⚙️  Encoding Mode: ⚡ BALANCED")
+        if self.best_quality:
+            print(f"   ⚙️  Encoding Mode: ⭐ MAXIMUM QUALITY")
+        else:
+            print(f"   ⚙️  Encoding Mode: ⚡ BALANCED")
 
         enabled_resolutions = []
         for quality in self.enabled_qualities:
@@ -657,44 +1068,95 @@ class HLSConverter:
 
         print(f"   🎯 Enabled Qualities: {', '.join(enabled_resolutions)}")
 
-    def probe_file(self) -> bool:
-        """Probe input file to get stream information"""
+    def _probe_cache_file(self) -> Path:
+        """Cache file for this input; the key changes whenever the file does"""
+        stat = os.stat(self.input_file)
+        key = f"{os.path.realpath(self.input_file)}:{stat.st_mtime_ns}:{stat.st_size}"
+        return PROBE_CACHE_DIR / f"{hashlib.blake2b(key.encode()).hexdigest()}.json"
+
+    def _load_probe_cache(self):
+        """Restore ffprobe and idet results saved by a previous run"""
+        try:
+            with open(self._probe_cache_file(), 'rb') as f:
+                cached = _json_loads(f.read())
+            self._probe_data = cached['probe']
+            self._interlace_result = cached.get('interlaced')
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save_probe_cache(self):
+        """Persist ffprobe and idet results (atomically, best-effort)"""
+        if self._probe_data is None:
+            return
+
         try:
+            cache_file = self._probe_cache_file()
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            with open(temp_file, 'wb') as f:
+                f.write(_json_dumps({'probe': self._probe_data, 'interlaced': self._interlace_result}))
+            os.replace(temp_file, cache_file)
+        except OSError:
+            pass
+
+    def _probe_once(self) -> Dict:
+        """Run ffprobe once per input; stream info and HDR metadata are all read from this"""
+        if self._probe_data is None:
+            self._load_probe_cache()
+
+        if self._probe_data is None:
+            # compact=1 drops the indentation, which is most of the bytes on
+            # tag-heavy files; stdout stays bytes for orjson
             cmd = [
                 'ffprobe',
                 '-v', 'quiet',
-                '-print_format', 'json',
+                '-print_format', 'json=compact=1',
                 '-show_format',
                 '-show_streams',
                 self.input_file
             ]
 
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
+            result = subprocess.run(_tool_cmd(cmd), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    check=True, close_fds=False)
+            self._probe_data = _json_loads(result.stdout)
+            self._save_probe_cache()
+
+        return self._probe_data
+
+    def probe_file(self) -> bool:
+        """Probe input file to get stream information"""
+        try:
+            data = self._probe_once()
 
             if 'streams' not in data:
                 print("❌ ERROR: No streams found in input file")
                 return False
 
-            print(f"\n{'='*70}")
+            print(f"\n{BAR}")
             print(f"🔍 Analyzing file: {os.path.basename(self.input_file)}")
-            print(f"{'='*70}")
+            print(BAR)
             print(f"Total streams found: {len(data['streams'])}")
 
             for stream in data['streams']:
                 codec_type = stream.get('codec_type', '').lower()
                 stream_index = stream.get('index', -1)
                 codec_name = stream.get('codec_name', 'unknown')
+                tags = stream.get('tags') or {}
 
                 print(f"\nStream #{stream_index}: type={codec_type}, codec={codec_name}")
 
                 if codec_type == 'video' and not self.video_info:
+                    fps = self._parse_fps(stream.get('r_frame_rate', '25/1'))
                     self.video_info = {
                         'index': stream['index'],
                         'codec': stream.get('codec_name'),
                         'width': stream.get('width'),
                         'height': stream.get('height'),
-                        'fps': self._parse_fps(stream.get('r_frame_rate', '25/1')),
+                        'fps': fps,
+                        # GOP length in frames, worked out once for every encode command;
+                        # rounded up so the encoder's own keyframe never lands just
+                        # ahead of the forced one on the segment boundary
+                        'segment_gop': str(math.ceil(fps * HLS_SEGMENT_SECONDS)),
                         'bitrate': stream.get('bit_rate', 'N/A'),
                         'pix_fmt': stream.get('pix_fmt', 'yuv420p'),
                         'profile': stream.get('profile', ''),
@@ -703,36 +1165,42 @@ class HLSConverter:
                     print(f"   ✓ Video stream detected")
 
                 elif codec_type == 'audio':
-                    lang = stream.get('tags', {}).get('language', 'und')
-                    title = stream.get('tags', {}).get('title', '')
+                    lang = tags.get('language', 'und')
+                    title = tags.get('title', '')
 
                     if not title:
                         title = f"{lang.upper()}" if lang != 'und' else f"Audio {len(self.audio_streams) + 1}"
 
-                    self.audio_streams.append({
-                        'index': stream['index'],
-                        'codec': stream.get('codec_name'),
-                        'channels': stream.get('channels', 2),
-                        'sample_rate': stream.get('sample_rate', '48000'),
-                        'language': lang,
-                        'title': title,
-                        'bitrate': stream.get('bit_rate', 'N/A')
-                    })
+                    self.audio_streams.append(AudioStream(
+                        index=stream['index'],
+                        codec=stream.get('codec_name'),
+                        channels=stream.get('channels', 2),
+                        sample_rate=stream.get('sample_rate', '48000'),
+                        language=lang,
+                        title=title,
+                        bitrate=stream.get('bit_rate', 'N/A'),
+                        profile=stream.get('profile', '')
+                    ))
                     print(f"   ✓ Audio stream detected: {title} ({lang})")
 
                 elif codec_type == 'subtitle':
-                    lang = stream.get('tags', {}).get('language', 'und')
-                    title = stream.get('tags', {}).get('title', '')
+                    lang = tags.get('language', 'und')
+                    title = tags.get('title', '')
 
                     if not title:
                         title = f"{lang.upper()}" if lang != 'und' else f"Subtitle {len(self.subtitle_streams) + 1}"
 
-                    self.subtitle_streams.append({
-                        'index': stream['index'],
-                        'codec': stream.get('codec_name'),
-                        'language': lang,
-                        'title': title
-                    })
+                    subtitle = SubtitleStream(
+                        index=stream['index'],
+                        codec=stream.get('codec_name'),
+                        language=lang,
+                        title=title
+                    )
+                    if codec_name.lower() in IMAGE_SUBTITLE_CODECS:
+                        self.image_subtitle_streams.append((len(self.subtitle_streams), subtitle))
+                    else:
+                        self.text_subtitle_streams.append((len(self.subtitle_streams), subtitle))
+                    self.subtitle_streams.append(subtitle)
                     print(f"   ✓ Subtitle stream detected: {title} ({lang}) - codec: {codec_name}")
 
             if not self.video_info:
@@ -741,23 +1209,24 @@ class HLSConverter:
 
             self.source_is_h264 = self._is_h264_compatible()
 
-            if 'high' in self.enabled_qualities and self.source_is_h264 and not self.force_reencode:
-                self.can_copy_video = True
-            else:
-                self.can_copy_video = False
-
             self._determine_quality_ladder()
 
-            print(f"\n{'='*70}")
+            for quality in self.enabled_qualities:
+                profile = self.quality_profiles[quality]
+                profile['stream_copy'] = self._copy_eligibility(quality, profile)
+            self.can_copy_video = any(self.quality_profiles[q]['stream_copy'] for q in self.enabled_qualities)
+            self._relax_transcoded_rungs()
+
+            print(f"\n{BAR}")
             print(f"📹 Video: {self.video_info['codec'].upper()} "
                   f"{self.video_info['width']}x{self.video_info['height']} "
                   f"@ {self.video_info['fps']} fps")
             print(f"   Profile: {self.video_info['profile']}, Level: {self.video_info['level']/10:.1f}")
             print(f"   Pixel Format: {self.video_info['pix_fmt']}")
 
-            print(f"\n{'='*70}")
+            print(f"\n{BAR}")
             print(f"🌐 BROWSER COMPATIBILITY CHECK")
-            print(f"{'='*70}")
+            print(BAR)
 
             codec_name = self.video_info['codec'].lower()
 
@@ -789,7 +1258,7 @@ class HLSConverter:
                 print(f"❌ Codec: {codec_name.upper()} - Unsupported for web")
                 print(f"   • Solution: ⚙️  Will transcode to H.264")
 
-            print(f"{'='*70}")
+            print(BAR)
 
             if self.video_info['height'] >= 2160:
                 print(f"\n🎬 Resolution Category: 4K/UHD")
@@ -805,20 +1274,20 @@ class HLSConverter:
             if self.audio_streams:
                 print(f"\n🔊 Found {len(self.audio_streams)} audio stream(s):")
                 for i, audio in enumerate(self.audio_streams):
-                    print(f"   [{i}] {audio['title']:30} | Lang: {audio['language']:5} | "
-                          f"Codec: {audio['codec']:8} | Channels: {audio['channels']}")
+                    print(f"   [{i}] {audio.title:30} | Lang: {audio.language:5} | "
+                          f"Codec: {audio.codec:8} | Channels: {audio.channels}")
             else:
                 print(f"\n⚠️  No audio streams found")
 
             if self.subtitle_streams:
                 print(f"\n💬 Found {len(self.subtitle_streams)} subtitle stream(s):")
                 for i, sub in enumerate(self.subtitle_streams):
-                    print(f"   [{i}] {sub['title']:30} | Lang: {sub['language']:5} | "
-                          f"Codec: {sub['codec']}")
+                    print(f"   [{i}] {sub.title:30} | Lang: {sub.language:5} | "
+                          f"Codec: {sub.codec}")
             else:
                 print(f"\n⚠️  No subtitle streams found")
 
-            print(f"\n{'='*70}\n")
+            print(f"\n{BAR}\n")
 
             return True
 
@@ -829,7 +1298,9 @@ class HLSConverter:
             print(f"❌ ERROR: Failed to parse ffprobe output: {e}")
             return False
 
-    def _parse_fps(self, fps_string: str) -> float:
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _parse_fps(fps_string: str) -> float:
         """Parse fps from fraction string"""
         try:
             if '/' in fps_string:
@@ -841,91 +1312,120 @@ class HLSConverter:
 
     def _calculate_scale(self, target_height: int) -> Tuple[str, int, int]:
         """Calculate proper scaling maintaining aspect ratio"""
-        source_height = self.video_info['height']
-        source_width = self.video_info['width']
-
-        if target_height >= source_height:
-            target_height = source_height
-            target_width = source_width
-        else:
-            aspect_ratio = source_width / source_height
-            target_width = int(target_height * aspect_ratio)
+        return _scale_dims(self.video_info['width'], self.video_info['height'], target_height)
 
-        target_width = target_width if target_width % 2 == 0 else target_width - 1
-        target_height = target_height if target_height % 2 == 0 else target_height - 1
-
-        return f"{target_width}:{target_height}", target_width, target_height
-
-    def convert_subtitles(self):
-        """Convert subtitles to standalone WebVTT files"""
+    def convert_subtitles(self, extracted: bool = False):
+        """Convert subtitles to standalone WebVTT files; extracted: an earlier run already wrote them"""
         print("\n📝 Converting subtitles to standalone WebVTT files...")
 
         if not self.subtitle_streams:
             print("   ⚠️  No subtitle streams detected")
             return
 
+        if self.image_subtitle_streams:
+            print(f"   ⚠️  Skipping {len(self.image_subtitle_streams)} image-based subtitle(s): "
+                  f"{', '.join(sub.title for _, sub in self.image_subtitle_streams)}")
+
         if self.dry_run:
-            print(f"   [DRY RUN] Would convert {len(self.subtitle_streams)} subtitle(s)")
+            print(f"   [DRY RUN] Would convert {len(self.text_subtitle_streams)} subtitle(s)")
             return
 
-        image_based_codecs = ['hdmv_pgs_subtitle', 'dvd_subtitle', 'dvdsub', 'pgssub', 'pgs']
         converted_count = 0
-        skipped_count = 0
+        skipped_count = len(self.image_subtitle_streams)
 
-        for i, subtitle in enumerate(self.subtitle_streams):
-            safe_lang = re.sub(r'[^\w\-]', '_', subtitle['language'])
-            output_vtt = self.output_dir / f"subtitle_{i}_{safe_lang}.vtt"
-            codec = subtitle['codec'].lower()
+        pending = []
+        for i, subtitle in self.text_subtitle_streams:
+            output_vtt = self._subtitle_output_path(i, subtitle)
 
-            print(f"\n   [{i}] Processing: {subtitle['title']} ({subtitle['language']})")
-            print(f"       Codec: {codec}")
+            print(f"\n   [{i}] Processing: {subtitle.title} ({subtitle.language})")
+            print(f"       Codec: {subtitle.codec}")
 
-            if codec in image_based_codecs:
-                print(f"       ⚠️  Image-based subtitle. Skipping.")
-                skipped_count += 1
-                continue
+            pending.append((i, subtitle, output_vtt))
 
-            cmd = [
-                'ffmpeg',
-                '-v', 'warning',
-                '-i', self.input_file,
-                '-map', f"0:{subtitle['index']}",
-                '-c:s', 'webvtt',
-                '-y',
-                str(output_vtt)
-            ]
+        # One ffmpeg run writes every text track, so the container is read once
+        fused_ok = extracted
+        if pending and not extracted:
+            print(f"\n   🔄 Extracting {len(pending)} text subtitle(s) in a single pass...")
 
-            try:
-                subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                             check=True, timeout=180)
-
-                if output_vtt.exists() and output_vtt.stat().st_size > 10:
-                    size_kb = output_vtt.stat().st_size / 1024
-                    print(f"       ✅ Successfully converted ({size_kb:.1f} KB)")
-                    converted_count += 1
-
-                    self.converted_subtitles.append({
-                        'file': output_vtt.name,
-                        'language': subtitle['language'],
-                        'title': subtitle['title'],
-                        'index': i
-                    })
-                else:
-                    print(f"       ❌ Conversion failed: empty output")
-                    skipped_count += 1
+            cmd = [*self._base_input_cmd(), '-v', 'warning']
+            for _, subtitle, output_vtt in pending:
+                cmd.extend(self._subtitle_output_args(subtitle, output_vtt))
 
+            try:
+                fused_ok = self._run_tool(cmd, timeout=180 * len(pending)) == 0
             except subprocess.TimeoutExpired:
-                print(f"       ❌ Conversion timed out")
-                skipped_count += 1
-            except subprocess.CalledProcessError as e:
-                print(f"       ❌ Conversion failed")
+                print(f"       ⚠️  Single pass timed out")
+
+            if not fused_ok:
+                print(f"       ⚠️  Single pass failed - converting tracks one by one")
+
+        # Redo failed tracks alone: a failed single pass may have left a
+        # truncated file, and one bad stream shouldn't sink the rest
+        retry = [(subtitle, output_vtt) for _, subtitle, output_vtt in pending
+                 if not (fused_ok and output_vtt.exists() and output_vtt.stat().st_size > 10)]
+        errors = {}
+        if retry:
+            with ThreadPoolExecutor(max_workers=min(len(retry), self.max_parallel),
+                                    thread_name_prefix='subtitles') as executor, \
+                    self._children_stopped_on_error():
+                errors = dict(zip((output_vtt for _, output_vtt in retry),
+                                  executor.map(lambda job: self._convert_subtitle_track(*job), retry)))
+
+        for i, subtitle, output_vtt in pending:
+            error = errors.get(output_vtt)
+
+            if error is None:
+                size_kb = output_vtt.stat().st_size / 1024
+                print(f"   [{i}] ✅ {subtitle.title}: converted ({size_kb:.1f} KB)")
+                converted_count += 1
+
+                self.converted_subtitles.append({
+                    'file': output_vtt.name,
+                    'language': subtitle.language,
+                    'title': subtitle.title,
+                    'index': i
+                })
+            else:
+                print(f"   [{i}] ❌ {subtitle.title}: conversion failed ({error})")
                 skipped_count += 1
 
-        print(f"\n   {'='*66}")
+        print(f"\n   {SUB_BAR}")
         print(f"   📊 Subtitle Conversion Summary:")
         print(f"      ✅ Converted: {converted_count}")
         print(f"      ❌ Skipped:   {skipped_count}")
-        print(f"   {'='*66}")
+        print(f"   {SUB_BAR}")
+
+    def _subtitle_output_path(self, position: int, subtitle: SubtitleStream) -> Path:
+        """WebVTT file a text subtitle track is written to"""
+        safe_lang = _safe_lang(subtitle.language)
+        return self.output_dir / f"subtitle_{position}_{safe_lang}.vtt"
+
+    @staticmethod
+    def _subtitle_output_args(subtitle: SubtitleStream, output_vtt: Path) -> List[str]:
+        """-map and WebVTT options for one subtitle track"""
+        return ['-map', f"0:{subtitle.index}", '-c:s', 'webvtt', *_MUXING_QUEUE, '-y', str(output_vtt)]
+
+    def _convert_subtitle_track(self, subtitle: SubtitleStream, output_vtt: Path) -> Optional[str]:
+        """Convert one subtitle track on its own; returns an error message or None"""
+        cmd = [
+            *self._base_input_cmd(subtitle.index),
+            '-v', 'warning',
+            '-c:s', 'webvtt',
+            '-y',
+            str(output_vtt)
+        ]
+
+        try:
+            self._run_tool(cmd, timeout=180, check=True)
+        except subprocess.TimeoutExpired:
+            return "timed out"
+        except subprocess.CalledProcessError:
+            return "ffmpeg error"
+
+        if not (output_vtt.exists() and output_vtt.stat().st_size > 10):
+            return "empty output"
+
+        return None
 
     def create_subtitle_manifest(self):
         """Create JSON manifest with subtitle information"""
@@ -946,30 +1446,30 @@ class HLSConverter:
         print(f"\n   ✓ Subtitle manifest created: {manifest_file}")
         print(f"      Contains {len(self.converted_subtitles)} subtitle track(s)")
 
-    def _validate_keyframes(self, output_name: str) -> Tuple[bool, str]:
+    def _validate_keyframes(self, output_name: str, durations: List[float]) -> Tuple[bool, str]:
         """Validate that HLS segments start with keyframes"""
         try:
-            segment_files = sorted(self.output_dir.glob(f"{output_name}_*.ts"))[:3]
-
-            if not segment_files:
-                return False, "No segment files found"
-
-            for segment in segment_files:
-                cmd = [
-                    'ffprobe',
-                    '-v', 'error',
-                    '-select_streams', 'v:0',
-                    '-show_entries', 'frame=pict_type',
-                    '-of', 'csv=p=0',
-                    '-read_intervals', '%+#1',
-                    str(segment)
-                ]
-
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-                first_frame_type = result.stdout.strip()
-
-                if first_frame_type != 'I':
-                    return False, f"Segment doesn't start with keyframe (type: {first_frame_type})"
+            media_file, _ = self._output_paths(output_name)
+            if not os.path.exists(media_file):
+                return False, "Media file not found"
+
+            stat = os.stat(media_file)
+            key = (media_file, stat.st_mtime_ns, stat.st_size)
+            if key not in self._keyframe_cache:
+                self._keyframe_cache[key] = self._probe_keyframes(media_file)
+            keyframes = self._keyframe_cache[key]
+
+            if not keyframes:
+                return False, "No keyframes found"
+
+            # Segment starts follow from the playlist durations; each must
+            # land on a keyframe of the single fMP4 file
+            segment_start = keyframes[0]
+            for duration in durations[:-1]:
+                segment_start += duration
+                i = bisect.bisect_left(keyframes, segment_start - 0.05)
+                if i == len(keyframes) or keyframes[i] > segment_start + 0.05:
+                    return False, f"Segment at {segment_start:.2f}s doesn't start with keyframe"
 
             return True, "All segments start with keyframes"
 
@@ -978,20 +1478,16 @@ class HLSConverter:
 
     def _validate_hls_segments(self, output_name: str) -> Tuple[bool, str]:
         """Enhanced validation: Check durations AND keyframes"""
-        m3u8_file = self.output_dir / f"{output_name}.m3u8"
+        _, m3u8_file = self._output_paths(output_name)
 
-        if not m3u8_file.exists():
+        if not os.path.exists(m3u8_file):
             return False, "M3U8 file not found"
 
         try:
-            with open(m3u8_file, 'r') as f:
+            with open(m3u8_file, 'rb') as f:
                 content = f.read()
 
-            durations = []
-            for line in content.split('\n'):
-                if line.startswith('#EXTINF:'):
-                    duration_str = line.split(':')[1].split(',')[0]
-                    durations.append(float(duration_str))
+            durations = list(map(float, _EXTINF_RE.findall(content)))
 
             if not durations:
                 return False, "No segments in playlist"
@@ -999,24 +1495,28 @@ class HLSConverter:
             if len(durations) < 2:
                 return False, f"Too few segments ({len(durations)})"
 
-            avg_duration = sum(durations) / len(durations)
-            min_duration = min(durations)
+            # The last segment is whatever is left of the source, so it may run
+            # short and is left out of the length and spread checks
+            full = durations[:-1]
+            avg_duration = sum(full) / len(full)
+            min_duration = min(full)
             max_duration = max(durations)
 
-            if min_duration < 4.0:
+            if min_duration < MIN_SEGMENT_SECONDS:
                 return False, f"Segment too short: {min_duration:.2f}s"
 
-            if max_duration > 8.0:
+            if max_duration > MAX_SEGMENT_SECONDS:
                 return False, f"Segment too long: {max_duration:.2f}s"
 
-            variance = sum((d - avg_duration) ** 2 for d in durations) / len(durations)
-            std_dev = variance ** 0.5
+            # E[d^2] - E[d]^2 keeps the sum of squares in C (map + sum)
+            variance = sum(map(operator.mul, full, full)) / len(full) - avg_duration ** 2
+            std_dev = max(variance, 0.0) ** 0.5
 
             if std_dev > 2.0:
                 return False, f"Inconsistent segments: stddev={std_dev:.2f}s"
 
             # Validate keyframes
-            keyframe_valid, keyframe_msg = self._validate_keyframes(output_name)
+            keyframe_valid, keyframe_msg = self._validate_keyframes(output_name, durations)
             if not keyframe_valid:
                 return False, f"Duration OK but {keyframe_msg}"
 
@@ -1025,44 +1525,233 @@ class HLSConverter:
         except Exception as e:
             return False, f"Validation error: {str(e)}"
 
+    def _probe_keyframes(self, media_file: Optional[str] = None) -> List[float]:
+        """Get keyframe timestamps from packet flags (no decoding); defaults to the source"""
+        if media_file is None:
+            media_file, stream = self.input_file, f"{self.video_info['index']}"
+        else:
+            stream = 'v:0'
+
+        if _pyav() is not None:
+            try:
+                return self._demux_keyframes(media_file, None if stream == 'v:0' else int(stream))
+            except Exception:
+                pass  # fall back to ffprobe
+
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', stream,
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            media_file
+        ]
+
+        result = subprocess.run(_tool_cmd(cmd), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                check=True, close_fds=False)
+
+        # One findall + map over the raw bytes keeps the per-packet work in C
+        return sorted(map(float, _KEYFRAME_PTS_RE.findall(result.stdout)))
+
+    @staticmethod
+    def _demux_keyframes(media_file: str, stream_index: Optional[int]) -> List[float]:
+        """Read keyframe timestamps in-process with PyAV (demux only, no decoding)"""
+        with _pyav().open(media_file) as container:
+            if stream_index is None:
+                stream = container.streams.video[0]
+            else:
+                stream = next(s for s in container.streams if s.index == stream_index)
+
+            return sorted(float(packet.pts * packet.time_base)
+                          for packet in container.demux(stream)
+                          if packet.is_keyframe and packet.pts is not None)
+
+    def _check_source_gop(self) -> bool:
+        """Check if the source keyframes already cut into valid HLS segments"""
+        if self.gop_fits_segments is not None:
+            return self.gop_fits_segments
+
+        try:
+            keyframes = self._probe_keyframes()
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+            # Can't tell - let the stream copy attempt and its validation decide
+            self.gop_fits_segments = True
+            return True
+
+        if len(keyframes) < 2:
+            self.gop_fits_segments = False
+            return False
+
+        # Replay the HLS muxer: a segment ends at the first keyframe at or past
+        # the next multiple of the target duration
+        durations = []
+        start = keyframes[0]
+        boundary = start + HLS_SEGMENT_SECONDS
+        for pts in keyframes[1:]:
+            if pts >= boundary:
+                durations.append(pts - start)
+                start = pts
+                boundary = keyframes[0] + HLS_SEGMENT_SECONDS * (len(durations) + 1)
+
+        self.gop_fits_segments = bool(durations) and all(
+            MIN_SEGMENT_SECONDS <= d <= MAX_SEGMENT_SECONDS for d in durations
+        )
+        return self.gop_fits_segments
+
+    def _run_tool(self, cmd: List[str], timeout: Optional[float] = None, check: bool = False) -> int:
+        """Run ffmpeg with its output discarded, like subprocess.run, but stoppable by _stop_children"""
+        with self._process_slots:
+            if self._stop_requested.is_set():
+                returncode = 1
+            else:
+                process = subprocess.Popen(_tool_cmd(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                           close_fds=False)
+                self._tool_processes.add(process)
+                try:
+                    returncode = process.wait(timeout=timeout)
+                except BaseException:
+                    # Timed out, or Ctrl-C on this thread: don't leave ffmpeg behind
+                    process.kill()
+                    process.wait()
+                    raise
+                finally:
+                    self._tool_processes.discard(process)
+
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return returncode
+
+    def _stop_children(self):
+        """Terminate every ffmpeg this converter is running, and start no more"""
+        self._stop_requested.set()
+        for process in list(self._active_processes) + list(self._tool_processes):
+            process.terminate()
+
+    @contextmanager
+    def _children_stopped_on_error(self):
+        """Stop the ffmpegs of worker threads if the block is left by an exception (Ctrl-C included)"""
+        # Entered inside a ThreadPoolExecutor's with, so the ffmpegs are stopped
+        # before the executor waits for its workers instead of after they finish
+        try:
+            yield
+        except BaseException:
+            self._stop_children()
+            raise
+
+    def _encode_threads(self) -> Tuple[str, str]:
+        """libx264 -threads and filter thread counts, sized to the CPUs the encode runs on"""
+        # A rung encoded alongside others gets its own CPUs and thread counts
+        # to match, instead of every ffmpeg sizing its pools to the whole machine.
+        # Filter graphs run on one thread unless told otherwise, which leaves
+        # scaling and deinterlacing as the bottleneck of a libx264 encode
+        cpus = getattr(self._rung_state, 'cpus', None)
+        if cpus:
+            return str(len(cpus)), str(len(cpus))
+        return '0', str(cpu_count())
+
+    def _run_ffmpeg_with_progress(self, cmd: List[str], indent: str = '   ') -> Tuple[int, List[str]]:
+        """Run ffmpeg showing throttled progress; returns (returncode, last stderr lines on failure)"""
+        cpus = getattr(self._rung_state, 'cpus', None)
+        show_progress = not getattr(self._rung_state, 'buffered', False)
+
+        # -progress writes key=value records to stdout, and is only asked for
+        # when they'll be shown; -nostats silences the status line on stderr
+        progress = ['-progress', 'pipe:1'] if show_progress else []
+        cmd = _tool_cmd(cmd[:1] + progress + ['-nostats'] + cmd[1:])
+
+        # Every ffmpeg spawned by this conversion takes one of max_parallel slots
+        with self._process_slots:
+            if self._stop_requested.is_set():
+                return 1, []
+
+            # Log output goes to an unread temp file and is only looked at if ffmpeg fails
+            with tempfile.TemporaryFile() as log:
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE if show_progress else subprocess.DEVNULL,
+                    stderr=log,
+                    bufsize=1024 * 1024,
+                    close_fds=False
+                )
+                self._active_processes.add(process)
+                try:
+                    if cpus:
+                        try:
+                            os.sched_setaffinity(process.pid, cpus)
+                        except OSError:
+                            pass
+
+                    # Drain progress off the main thread so a slow terminal never backs
+                    # up ffmpeg; a record ends at its progress= line, and is printed at
+                    # most once a second
+                    def drain():
+                        record = {}
+                        last_print = 0.0
+                        for raw in process.stdout:
+                            key, _, value = raw.partition(b'=')
+                            if key != b'progress':
+                                record[key] = value.strip()
+                                continue
+
+                            now = time.monotonic()
+                            if now - last_print >= 1.0 or value.strip() == b'end':
+                                print(f"{indent}frame={int(record.get(b'frame', b'0') or 0)} "
+                                      f"fps={record.get(b'fps', b'0').decode()} "
+                                      f"time={record.get(b'out_time', b'N/A').decode()} "
+                                      f"speed={record.get(b'speed', b'N/A').decode().strip()}\r", end='', flush=True)
+                                last_print = now
+
+                    reader = None
+                    if show_progress:
+                        reader = threading.Thread(target=drain, daemon=True)
+                        reader.start()
+                    try:
+                        process.wait()
+                    except BaseException:
+                        process.kill()
+                        raise
+                    if reader is not None:
+                        reader.join()
+                finally:
+                    self._active_processes.discard(process)
+
+                tail = []
+                if process.returncode != 0:
+                    log.seek(max(log.seek(0, os.SEEK_END) - 65536, 0))
+                    lines = log.read().decode('utf-8', 'replace').splitlines()
+                    tail = [line + '\n' for line in lines[-64:] if line.strip()]
+
+        return process.returncode, tail
+
     def _try_stream_copy(self, profile_name: str, output_name: str) -> bool:
         """Attempt stream copy with validation"""
         print(f"   🎯 Stage 1: STREAM COPY attempt...")
 
+        # Stage the attempt in a scratch dir so a failure is one rmtree and
+        # a half-written rendition never sits next to the finished ones
+        scratch = os.path.join(self.output_dir, f".{output_name}.tmp")
+        shutil.rmtree(scratch, ignore_errors=True)
+        os.mkdir(scratch)
+        staged_name = os.path.join(os.path.basename(scratch), output_name)
+
         cmd = [
-            'ffmpeg',
-            '-i', self.input_file,
-            '-map', f"0:{self.video_info['index']}",
+            *self._base_input_cmd(self.video_info['index']),
             '-c:v', 'copy',
             '-an',
+            *_MUXING_QUEUE,
             '-f', 'hls',
-            '-hls_time', '6',
+            '-hls_time', f'{HLS_SEGMENT_SECONDS:g}',
             '-hls_playlist_type', 'vod',
-            '-hls_segment_type', 'mpegts',
-            '-hls_segment_filename', str(self.output_dir / f"{output_name}_%03d.ts"),
+            *self._hls_segment_args(staged_name),
             '-v', 'warning',
-            '-stats',
             '-y',
-            str(self.output_dir / f"{output_name}.m3u8")
+            self._output_paths(staged_name)[1]
         ]
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
+            returncode, stderr_lines = self._run_ffmpeg_with_progress(cmd, indent='      ')
 
-            stderr_lines = []
-            for line in process.stderr:
-                stderr_lines.append(line)
-                if 'frame=' in line:
-                    print(f"      {line.strip()}\r", end='', flush=True)
-
-            process.wait()
-
-            if process.returncode != 0:
+            if returncode != 0:
                 error_text = ''.join(stderr_lines[-10:])
                 if 'non-monotonous DTS' in error_text:
                     print(f"\n      ❌ Failed: Non-monotonous DTS")
@@ -1073,13 +1762,18 @@ class HLSConverter:
                 return False
 
             print(f"\n      ⏳ Validating HLS quality...")
-            is_valid, reason = self._validate_hls_segments(output_name)
+            is_valid, reason = self._validate_hls_segments(staged_name)
 
             if is_valid:
+                # The playlist names its media file relatively, so moving
+                # both up together keeps it valid
+                for name in os.listdir(scratch):
+                    os.replace(os.path.join(scratch, name), os.path.join(self.output_dir, name))
+                os.rmdir(scratch)
                 print(f"      ✅ STREAM COPY successful!")
                 print(f"         {reason}")
                 print(f"         Quality: 100% original (zero loss)")
-                self.stream_copy_used = True
+                self.copied_qualities.add(profile_name)
                 return True
             else:
                 print(f"      ⚠️  Stream copy completed but validation failed")
@@ -1094,6 +1788,9 @@ class HLSConverter:
             print(f"\n      ❌ Stream copy exception: {e}")
             return False
 
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
     def _visually_lossless_encode(self, profile_name: str, profile: Dict, output_name: str) -> bool:
         """Fallback: Visually lossless re-encode at CRF 15"""
         print(f"   ⚡ Stage 2: VISUALLY LOSSLESS re-encode (CRF 15)")
@@ -1102,28 +1799,19 @@ class HLSConverter:
 
         scale, width, height = self._calculate_scale(profile['height'])
 
-        cmd = [
-            'ffmpeg',
-            '-i', self.input_file,
-            '-map', f"0:{self.video_info['index']}",
-        ]
-
-        if self.hw_accel == 'vaapi':
-            cmd.extend(['-hwaccel', 'vaapi', '-hwaccel_output_format', 'vaapi'])
+        cmd = self._base_input_cmd(self.video_info['index'], hwaccel=True)
 
         # Add deinterlacing if needed
         vf_filters = []
         if self.is_interlaced:
-            if self.hw_accel == 'vaapi':
-                vf_filters.append('deinterlace_vaapi')
-            else:
-                vf_filters.append('yadif=0:-1:0')
+            vf_filters.append(self._deinterlace_filter())
 
         # Visually lossless settings
         if self.hw_accel == 'nvenc':
             cmd.extend([
                 '-c:v', 'h264_nvenc',
                 '-preset', 'p7',
+                '-tune', 'hq',
                 '-profile:v', 'high',
                 '-level', '4.1',
                 '-rc:v', 'vbr',
@@ -1131,6 +1819,7 @@ class HLSConverter:
                 '-b:v', '0',
                 '-spatial_aq', '1',
                 '-temporal_aq', '1',
+                '-forced-idr', '1',
             ])
         elif self.hw_accel == 'qsv':
             cmd.extend([
@@ -1167,8 +1856,11 @@ class HLSConverter:
                 '-qp', '15',
             ])
         else:
+            threads, filter_threads = self._encode_threads()
             cmd.extend([
                 '-c:v', 'libx264',
+                '-threads', threads,
+                '-filter_threads', filter_threads,
                 '-preset', 'slow',
                 '-profile:v', 'high',
                 '-level', '4.1',
@@ -1182,37 +1874,26 @@ class HLSConverter:
 
         # Keyframe settings for HLS
         cmd.extend([
-            '-g', str(int(self.video_info['fps'] * 6)),
-            '-keyint_min', str(int(self.video_info['fps'] * 6)),
+            '-g', self.video_info['segment_gop'],
+            '-keyint_min', self.video_info['segment_gop'],
+            *_SEGMENT_KEYFRAMES,
             '-sc_threshold', '0',
-            '-pix_fmt', 'yuv420p',
+            *self._pix_fmt_args(),
             '-an',
+            *_MUXING_QUEUE,
             '-f', 'hls',
-            '-hls_time', '6',
+            '-hls_time', f'{HLS_SEGMENT_SECONDS:g}',
             '-hls_playlist_type', 'vod',
-            '-hls_segment_type', 'mpegts',
-            '-hls_segment_filename', str(self.output_dir / f"{output_name}_%03d.ts"),
+            *self._hls_segment_args(output_name),
             '-v', 'warning',
-            '-stats',
             '-y',
-            str(self.output_dir / f"{output_name}.m3u8")
+            self._output_paths(output_name)[1]
         ])
 
         try:
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-
-            for line in process.stderr:
-                if 'frame=' in line:
-                    print(f"      {line.strip()}\r", end='', flush=True)
-
-            process.wait()
+            returncode, _ = self._run_ffmpeg_with_progress(cmd, indent='      ')
 
-            if process.returncode == 0:
+            if returncode == 0:
                 print(f"\n      ✅ Visually lossless encode completed")
                 return True
             else:
@@ -1227,55 +1908,142 @@ class HLSConverter:
         """Normal encoding for medium/low quality"""
         encoder_name, encoder_settings = self.get_encoder_settings(profile)
 
-        cmd = [
-            'ffmpeg',
-            '-i', self.input_file,
-            '-map', f"0:{self.video_info['index']}",
-        ]
-
-        if self.hw_accel == 'vaapi':
-            cmd.extend(['-hwaccel', 'vaapi', '-hwaccel_output_format', 'vaapi'])
+        cmd = self._base_input_cmd(self.video_info['index'], hwaccel=True)
 
         cmd.extend(encoder_settings)
+        if encoder_name == 'libx264':
+            threads, filter_threads = self._encode_threads()
+            cmd.extend(['-threads', threads, '-filter_threads', filter_threads])
 
         # Build filter chain
         vf_filters = []
 
         # Deinterlacing
         if self.is_interlaced:
-            if self.hw_accel == 'vaapi':
-                vf_filters.append('deinterlace_vaapi')
-            else:
-                vf_filters.append('yadif=0:-1:0')
+            vf_filters.append(self._deinterlace_filter())
 
         # Scaling
-        if self.hw_accel == 'vaapi':
-            vf_filters.append(f"scale_vaapi=w={width}:h={height}")
-        else:
-            vf_filters.append(f"scale={scale}:flags=lanczos")
+        scale_filter = self._scale_filter(scale, width, height)
+        if scale_filter:
+            vf_filters.append(scale_filter)
 
         if vf_filters:
             cmd.extend(['-vf', ','.join(vf_filters)])
 
-        cmd.extend([
+        cmd.extend(self._hls_video_output_args(profile, output_name))
+        cmd.extend(['-v', 'warning', '-y'])
+
+        self._print_encode_settings(encoder_name, profile, width, height)
+
+        try:
+            print(f"   Encoding...")
+
+            returncode, _ = self._run_ffmpeg_with_progress(cmd)
+
+            if returncode == 0:
+                print(f"\n   ✅ {profile_name} video completed")
+                return True
+            else:
+                print(f"\n   ❌ {profile_name} video failed")
+                return False
+
+        except Exception as e:
+            print(f"\n   ❌ Error: {e}")
+            return False
+
+    def _base_input_cmd(self, stream_index: Optional[int] = None, hwaccel: bool = False) -> List[str]:
+        """ffmpeg invocation up to the input (and its -map, when one stream is wanted)"""
+        key = (stream_index, hwaccel and self.hw_accel)
+        prefix = self._input_cmd_cache.get(key)
+        if prefix is None:
+            cmd = ['ffmpeg']
+            # Input options: these only take effect ahead of -i
+            if hwaccel and self.hw_accel == 'vaapi':
+                cmd.extend(['-hwaccel', 'vaapi', '-hwaccel_output_format', 'vaapi'])
+            elif hwaccel and self._cuda_frames():
+                cmd.extend(['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'])
+            cmd.extend(['-i', self.input_file])
+            if stream_index is not None:
+                cmd.extend(['-map', f"0:{stream_index}"])
+            prefix = self._input_cmd_cache[key] = tuple(cmd)
+        return list(prefix)
+
+    def _cuda_frames(self) -> bool:
+        """Whether NVENC rungs can decode, deinterlace and scale without leaving the GPU"""
+        if self.hw_accel != 'nvenc' or self.video_info.get('pix_fmt') not in ('yuv420p', 'yuvj420p'):
+            return False
+        if (self.video_info.get('codec') or '').lower() not in NVDEC_CODECS:
+            return False
+        filters = _cuda_filters()
+        return 'scale' in filters and ('yadif' in filters or not self.is_interlaced)
+
+    def _gpu_frames(self) -> bool:
+        """Whether encoded rungs' frames stay in GPU memory from decode to encode"""
+        return self.hw_accel == 'vaapi' or self._cuda_frames()
+
+    def _pix_fmt_args(self) -> List[str]:
+        """-pix_fmt for encoded rungs; GPU frames are already in the encoder's format"""
+        return [] if self._gpu_frames() else ['-pix_fmt', 'yuv420p']
+
+    def _deinterlace_filter(self) -> str:
+        """Deinterlacing filter for the active encoder"""
+        if self.hw_accel == 'vaapi':
+            return 'deinterlace_vaapi'
+        if self._cuda_frames():
+            return f"{_cuda_filters()['yadif']}=0:-1:0"
+        return 'yadif=0:-1:0'
+
+    def _scale_filter(self, scale: str, width: int, height: int) -> Optional[str]:
+        """Scaling filter for the active encoder; None when the rung keeps the source size"""
+        if (width, height) == (self.video_info['width'], self.video_info['height']):
+            return None
+        if self.hw_accel == 'vaapi':
+            return f"scale_vaapi=w={width}:h={height}"
+        if self._cuda_frames():
+            return f"{_cuda_filters()['scale']}=w={width}:h={height}:interp_algo=lanczos"
+        # Lanczos costs several times bicubic and only pays off on big reductions
+        flags = 'lanczos' if height < self.video_info['height'] * 0.75 else 'bicubic'
+        return f"scale={scale}:flags={flags}"
+
+    def _output_paths(self, output_name: str) -> Tuple[str, str]:
+        """(media file, playlist) paths of a rendition, built once per name"""
+        paths = self._path_cache.get(output_name)
+        if paths is None:
+            base = os.path.join(self.output_dir, output_name)
+            media_ext = 'mp4' if self.segment_type == 'fmp4' else 'ts'
+            paths = (f"{base}.{media_ext}", f"{base}.m3u8")
+            self._path_cache[output_name] = paths
+        return paths
+
+    def _hls_segment_args(self, output_name: str) -> List[str]:
+        """Segment a rendition into one fMP4 (or MPEG-TS) file addressed by byte ranges"""
+        return [
+            '-hls_segment_type', self.segment_type,
+            '-hls_flags', 'single_file',
+            '-hls_segment_filename', self._output_paths(output_name)[0],
+        ]
+
+    def _hls_video_output_args(self, profile: Dict, output_name: str) -> List[str]:
+        """Rate control, GOP and HLS muxer options for one encoded video rung"""
+        return [
             '-maxrate', profile['maxrate'],
             '-bufsize', profile['bufsize'],
-            '-g', str(int(self.video_info['fps'] * 2)),
-            '-keyint_min', str(int(self.video_info['fps'])),
+            '-g', self.video_info['segment_gop'],
+            '-keyint_min', self.video_info['segment_gop'],
+            *_SEGMENT_KEYFRAMES,
             '-sc_threshold', '0',
-            '-pix_fmt', 'yuv420p',
+            *self._pix_fmt_args(),
             '-an',
+            *_MUXING_QUEUE,
             '-f', 'hls',
-            '-hls_time', '6',
+            '-hls_time', f'{HLS_SEGMENT_SECONDS:g}',
             '-hls_playlist_type', 'vod',
-            '-hls_segment_type', 'mpegts',
-            '-hls_segment_filename', str(self.output_dir / f"{output_name}_%03d.ts"),
-            '-v', 'warning',
-            '-stats',
-            '-y',
-            str(self.output_dir / f"{output_name}.m3u8")
-        ])
+            *self._hls_segment_args(output_name),
+            self._output_paths(output_name)[1]
+        ]
 
+    def _print_encode_settings(self, encoder_name: str, profile: Dict, width: int, height: int):
+        """Print the settings used for an encoded rung"""
         print(f"   Settings:")
         print(f"      Encoder: {encoder_name}")
         print(f"      Resolution: {width}x{height}")
@@ -1286,41 +2054,238 @@ class HLSConverter:
         if self.is_interlaced:
             print(f"      Deinterlacing: enabled")
 
-        try:
-            print(f"   Encoding...")
+    def _encode_variants_single_pass(self, profile_names: List[str]) -> bool:
+        """Encode several rungs from one decode: split the source and scale per rung"""
+        print(f"\n🎬 Converting {', '.join(profile_names)} quality video in a single pass...")
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
+        cmd = self._base_input_cmd(hwaccel=True)
+        cmd.extend(self._video_variants_args(profile_names))
+        cmd.extend(['-v', 'warning', '-y'])
 
-            for line in process.stderr:
-                if 'frame=' in line:
-                    print(f"   {line.strip()}\r", end='', flush=True)
+        try:
+            print(f"\n   Encoding...")
 
-            process.wait()
+            returncode, _ = self._run_ffmpeg_with_progress(cmd)
 
-            if process.returncode == 0:
-                print(f"\n   ✅ {profile_name} video completed")
+            if returncode == 0:
+                print(f"\n   ✅ {', '.join(profile_names)} video completed")
                 return True
             else:
-                print(f"\n   ❌ {profile_name} video failed")
+                print(f"\n   ❌ Single-pass encode failed")
                 return False
 
         except Exception as e:
             print(f"\n   ❌ Error: {e}")
             return False
 
+    def _video_variants_args(self, profile_names: List[str]) -> List[str]:
+        """-filter_complex and per-rung output options encoding several rungs from one decode"""
+        # Deinterlace once, before the split, rather than per rung
+        source = f"[0:{self.video_info['index']}]"
+        if self.is_interlaced:
+            source += f"{self._deinterlace_filter()},"
+
+        if self.best_quality:
+            # Every rung is scaled straight from the source
+            branches = ''.join(f"[s_{name}]" for name in profile_names)
+            graph = [f"{source}split={len(profile_names)}{branches}"]
+        else:
+            # Down-ladder: each rung is scaled from the next larger one, so the
+            # small rungs never touch full-resolution frames
+            profile_names = sorted(profile_names, key=lambda q: self.quality_profiles[q]['height'], reverse=True)
+            graph = []
+
+        outputs = []
+        threads, filter_threads = self._encode_threads()
+        x264_rungs = 0
+        for k, name in enumerate(profile_names):
+            profile = self.quality_profiles[name]
+            scale, width, height = self._calculate_scale(profile['height'])
+            scale_filter = self._scale_filter(scale, width, height) or 'null'
+
+            if self.best_quality:
+                graph.append(f"[s_{name}]{scale_filter}[o_{name}]")
+            else:
+                rung_input = source if k == 0 else f"[c_{profile_names[k - 1]}]"
+                if k == len(profile_names) - 1:
+                    graph.append(f"{rung_input}{scale_filter}[o_{name}]")
+                else:
+                    graph.append(f"{rung_input}{scale_filter},split=2[o_{name}][c_{name}]")
+
+            encoder_name, encoder_settings = self.get_encoder_settings(profile)
+            print(f"\n   {name}:")
+            self._print_encode_settings(encoder_name, profile, width, height)
+
+            outputs.extend(['-map', f"[o_{name}]"])
+            outputs.extend(encoder_settings)
+            if encoder_name == 'libx264':
+                outputs.extend(['-threads', threads])
+                x264_rungs += 1
+            outputs.extend(self._hls_video_output_args(profile, f"video_{name}"))
+
+        graph_args = ['-filter_complex', ';'.join(graph)]
+        if x264_rungs:
+            graph_args[:0] = ['-filter_complex_threads', filter_threads]
+        return [*graph_args, *outputs]
+
+    def _load_copied_qualities(self) -> set:
+        """Rungs a previous run into this output dir stream-copied"""
+        try:
+            with open(self.output_dir / RESUME_STATE_FILE, 'rb') as f:
+                return set(_json_loads(f.read()).get('copied_qualities', []))
+        except (OSError, ValueError, AttributeError):
+            return set()
+
+    def _save_copied_qualities(self):
+        """Record the stream-copied rungs for a later resumed run"""
+        try:
+            with open(self.output_dir / RESUME_STATE_FILE, 'wb') as f:
+                f.write(_json_dumps({'copied_qualities': sorted(self.copied_qualities)}))
+        except OSError:
+            pass
+
+    def _reuse_existing_video(self, profile_name: str) -> bool:
+        """Keep a rung a previous run already produced, if its playlist still validates"""
+        output_name = f"video_{profile_name}"
+        # ffmpeg rewrites the playlist after every segment and ends it even when
+        # interrupted, so one cut short still validates unless its length is checked
+        if self.force_reencode or not self._playlist_complete(output_name):
+            return False
+
+        is_valid, _ = self._validate_hls_segments(output_name)
+        if not is_valid:
+            return False
+
+        print(f"   ⏭️  Reusing existing valid variant: {profile_name}")
+        if profile_name in self._load_copied_qualities():
+            self.copied_qualities.add(profile_name)
+        return True
+
+    def _audio_rendition_complete(self, output_name: str) -> bool:
+        """Whether a previous run finished this audio rendition"""
+        return not self.force_reencode and self._playlist_complete(output_name)
+
+    def _playlist_complete(self, output_name: str) -> bool:
+        """Whether a rendition's playlist is ended and its segments cover the whole source"""
+        media_file, playlist = self._output_paths(output_name)
+        if not os.path.exists(media_file):
+            return False
+        try:
+            with open(playlist, 'rb') as f:
+                content = f.read()
+            source_duration = float(self._probe_once().get('format', {}).get('duration', 0) or 0)
+        except (OSError, ValueError, TypeError):
+            return False
+
+        if b'#EXT-X-ENDLIST' not in content or source_duration <= 0:
+            return False
+        covered = sum(map(float, _EXTINF_RE.findall(content)))
+        return covered >= source_duration - RESUME_DURATION_TOLERANCE
+
+    def _discard_renditions(self, output_names: List[str]):
+        """Delete what a failed run wrote for these renditions, so no fallback reuses it"""
+        names = [os.path.basename(path) for name in output_names for path in self._output_paths(name)]
+        with os.scandir(self.output_dir) as entries:
+            present = {entry.name for entry in entries}
+        self._delete_output_files([name for name in names if name in present])
+
+    def convert_all_video_variants(self) -> bool:
+        """Convert every enabled rung, sharing one decode between the encoded ones"""
+        copy_rungs = [q for q in self.enabled_qualities if self.quality_profiles[q].get('stream_copy')]
+        encode_rungs = [q for q in self.enabled_qualities
+                        if q not in copy_rungs and not self._reuse_existing_video(q)]
+
+        success = True
+
+        # Stream copies never decode, so they run on their own
+        for profile_name in copy_rungs:
+            if not self.convert_video_quality_variant(profile_name, self.quality_profiles[profile_name]):
+                success = False
+
+        # One decode feeding every rung beats one process per rung, so --parallel
+        # only comes into play when the shared filter graph fails
+        if len(encode_rungs) > 1 and not self.dry_run:
+            if self._encode_variants_single_pass(encode_rungs):
+                return success
+            print(f"   🔄 Falling back to one encode per quality...")
+            # A failed run can still end its playlists, so nothing it wrote is kept
+            self._discard_renditions([f"video_{q}" for q in encode_rungs])
+
+            if self.parallel:
+                return self._convert_rungs_in_parallel(encode_rungs) and success
+
+        for profile_name in encode_rungs:
+            if not self.convert_video_quality_variant(profile_name, self.quality_profiles[profile_name]):
+                success = False
+
+        return success
+
+    @staticmethod
+    def _split_cpus(parts: int) -> List[Optional[List[int]]]:
+        """Divide the CPUs we may run on into disjoint sets, one per concurrent encode"""
+        try:
+            available = sorted(os.sched_getaffinity(0))
+        except AttributeError:  # not Linux
+            return [None] * parts
+
+        share = len(available) // parts
+        if share == 0:
+            return [None] * parts
+        return [available[i * share:(i + 1) * share] for i in range(parts)]
+
+    def _convert_rungs_in_parallel(self, profile_names: List[str]) -> bool:
+        """Encode rungs side by side, one ffmpeg each"""
+        success = True
+
+        # Each rung's messages are collected and printed in one piece when it
+        # finishes, so concurrent rungs can't interleave their output
+        output = _ThreadBufferedStdout(sys.stdout)
+
+        def convert_on(profile_name: str, cpus: Optional[List[int]]) -> bool:
+            self._rung_state.cpus = cpus
+            self._rung_state.buffered = True
+            output.hold()
+            try:
+                return self.convert_video_quality_variant(profile_name, self.quality_profiles[profile_name])
+            finally:
+                output.release()
+
+        sys.stdout = output
+        try:
+            # The encoding happens in ffmpeg subprocesses, so threads are enough:
+            # nothing is pickled and every rung shares this converter's state
+            with ThreadPoolExecutor(max_workers=min(len(profile_names), self.max_parallel)) as executor, \
+                    self._children_stopped_on_error():
+                futures = [executor.submit(convert_on, name, cpus)
+                           for name, cpus in zip(profile_names, self._split_cpus(len(profile_names)))]
+
+                for future in as_completed(futures):
+                    if not future.result():
+                        # The run has failed either way: drop queued rungs and stop
+                        # the running ones instead of letting them finish for nothing.
+                        # Rungs still waiting for a process slot see the stop request
+                        # and return without starting ffmpeg
+                        success = False
+                        for pending in futures:
+                            pending.cancel()
+                        self._stop_children()
+                        break
+        finally:
+            sys.stdout = output.stream
+
+        return success
+
     def convert_video_quality_variant(self, profile_name: str, profile: Dict) -> bool:
         """Convert video-only stream for a specific quality"""
         print(f"\n🎬 Converting {profile_name} quality video...")
 
+        if self._reuse_existing_video(profile_name):
+            return True
+
         scale, width, height = self._calculate_scale(profile['height'])
         output_name = f"video_{profile_name}"
 
-        use_copy = (profile_name == 'high' and self.can_copy_video)
+        use_copy = profile.get('stream_copy', False)
 
         if use_copy:
             print(f"   📋 Two-stage approach:")
@@ -1331,18 +2296,16 @@ class HLSConverter:
                 print(f"   [DRY RUN] Would attempt stream copy → CRF 15 fallback")
                 return True
 
+            if not self._check_source_gop():
+                print(f"   ⚠️  Source keyframes don't line up with {HLS_SEGMENT_SECONDS:g}s segments - skipping stream copy")
+                return self._visually_lossless_encode(profile_name, profile, output_name)
+
             success = self._try_stream_copy(profile_name, output_name)
 
             if success:
                 return True
 
-            # Clean up failed stream copy
-            print(f"\n   🔄 Cleaning up and initiating fallback...")
-            for f in self.output_dir.glob(f"{output_name}_*.ts"):
-                f.unlink()
-            m3u8_file = self.output_dir / f"{output_name}.m3u8"
-            if m3u8_file.exists():
-                m3u8_file.unlink()
+            print(f"\n   🔄 Initiating fallback...")
 
             return self._visually_lossless_encode(profile_name, profile, output_name)
 
@@ -1356,43 +2319,97 @@ class HLSConverter:
 
             return self._normal_encode(profile_name, profile, width, height, scale, output_name)
 
-    def convert_audio_track(self, audio_index: int, audio_stream: Dict, quality: str) -> bool:
+    def convert_audio_track(self, audio_index: int, audio_stream: AudioStream, quality: str) -> bool:
         """Convert a single audio track"""
-        profile = self.audio_profiles[quality]
-        safe_lang = re.sub(r'[^\w\-]', '_', audio_stream['language'])
-        output_name = f"audio_{audio_index}_{safe_lang}_{quality}"
-
-        print(f"   Converting: Audio #{audio_index} ({audio_stream['title']}) - {quality}...")
+        print(f"   Converting: Audio #{audio_index} ({audio_stream.title}) - {quality}...")
 
         if self.dry_run:
-            print(f"      [DRY RUN] Would convert to AAC {profile['bitrate']}")
+            print(f"      [DRY RUN] Would convert to AAC {self.audio_profiles[quality]['bitrate']}")
             return True
 
         cmd = [
-            'ffmpeg',
-            '-i', self.input_file,
-            '-map', f"0:{audio_stream['index']}",
-            '-c:a', 'aac',
-            '-b:a', profile['bitrate'],
-            '-ar', profile['sample_rate'],
-            '-ac', '2',
-            '-f', 'hls',
-            '-hls_time', '6',
-            '-hls_playlist_type', 'vod',
-            '-hls_segment_type', 'mpegts',
-            '-hls_segment_filename', str(self.output_dir / f"{output_name}_%03d.ts"),
+            *self._base_input_cmd(),
+            *self._audio_output_args(audio_index, audio_stream, quality),
             '-v', 'warning',
             '-y',
-            str(self.output_dir / f"{output_name}.m3u8")
         ]
 
         try:
-            subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-            print(f"         ✓ Completed")
+            self._run_tool(cmd, check=True)
+            print(f"         ✓ Audio #{audio_index} {quality} completed")
             return True
         except subprocess.CalledProcessError:
-            print(f"         ✗ Failed")
+            print(f"         ✗ Audio #{audio_index} {quality} failed")
+            return False
+
+    def _audio_output_args(self, audio_index: int, audio_stream: AudioStream, quality: str) -> List[str]:
+        """-map, AAC and HLS options for one audio rendition"""
+        profile = self.audio_profiles[quality]
+        safe_lang = _safe_lang(audio_stream.language)
+        output_name = f"audio_{audio_index}_{safe_lang}_{quality}"
+
+        if self._can_copy_audio(audio_stream, profile):
+            codec_args = ['-c:a', 'copy']
+        else:
+            codec_args = [
+                '-c:a', 'aac',
+                '-b:a', profile['bitrate'],
+                '-ar', profile['sample_rate'],
+                '-ac', '2',
+            ]
+
+        return [
+            '-map', f"0:{audio_stream.index}",
+            *codec_args,
+            *_MUXING_QUEUE,
+            '-f', 'hls',
+            '-hls_time', f'{HLS_SEGMENT_SECONDS:g}',
+            '-hls_playlist_type', 'vod',
+            *self._hls_segment_args(output_name),
+            self._output_paths(output_name)[1]
+        ]
+
+    @staticmethod
+    def _can_copy_audio(audio_stream: AudioStream, profile: Dict) -> bool:
+        """Whether a track can be remuxed as is: stereo AAC-LC at the rendition's sample rate and within its bitrate"""
+        # Encoded renditions are resampled and downmixed to the profile, so a
+        # copy has to match them for the ladder to stay consistent
+        if audio_stream.codec != 'aac' or audio_stream.profile != 'LC' or audio_stream.channels != 2:
+            return False
+        if str(audio_stream.sample_rate) != profile['sample_rate']:
             return False
+        try:
+            source_bitrate = int(audio_stream.bitrate)
+        except (TypeError, ValueError):
+            return False
+        return source_bitrate <= int(profile['bitrate'].rstrip('k')) * 1000 * AUDIO_COPY_BITRATE_TOLERANCE
+
+    def _convert_audio_track_all_qualities(self, audio_index: int, audio_stream: AudioStream) -> bool:
+        """Convert one audio track to every enabled quality with a single decode"""
+        safe_lang = _safe_lang(audio_stream.language)
+        qualities = [q for q in self.enabled_qualities
+                     if not self._audio_rendition_complete(f"audio_{audio_index}_{safe_lang}_{q}")]
+
+        if not qualities:
+            print(f"   ⏭️  Reusing existing Audio #{audio_index} ({audio_stream.title})")
+            return True
+
+        print(f"   Converting: Audio #{audio_index} ({audio_stream.title}) - {', '.join(qualities)}...")
+
+        cmd = self._base_input_cmd()
+        for quality in qualities:
+            cmd.extend(self._audio_output_args(audio_index, audio_stream, quality))
+        cmd.extend(['-v', 'warning', '-y'])
+
+        try:
+            self._run_tool(cmd, check=True)
+            print(f"         ✓ Audio #{audio_index} completed")
+            return True
+        except subprocess.CalledProcessError:
+            print(f"         ⚠️  Audio #{audio_index} single pass failed - converting qualities one by one")
+
+        return all([self.convert_audio_track(audio_index, audio_stream, quality)
+                    for quality in qualities])
 
     def convert_all_audio_tracks(self):
         """Convert all audio tracks"""
@@ -1400,19 +2417,28 @@ class HLSConverter:
             print("\n⚠️  No audio streams - creating video-only")
             return True
 
-        print(f"\n{'='*70}")
+        print(f"\n{BAR}")
         print(f"🔊 Converting {len(self.audio_streams)} audio track(s) x {len(self.enabled_qualities)} qualities")
-        print(f"{'='*70}")
+        print(BAR)
 
         if self.dry_run:
             print(f"[DRY RUN] Would convert audio to AAC")
             return True
 
-        success = True
         for i, audio in enumerate(self.audio_streams):
-            print(f"\n📻 Audio Track #{i}: {audio['title']} ({audio['language']})")
-            for quality in self.enabled_qualities:
-                if not self.convert_audio_track(i, audio, quality):
+            print(f"\n📻 Audio Track #{i}: {audio.title} ({audio.language})")
+        print()
+
+        # One ffmpeg per track writes all its qualities; AAC encodes are light
+        # and subprocess-bound, so the tracks run side by side
+        success = True
+        with ThreadPoolExecutor(max_workers=min(len(self.audio_streams), self.max_parallel),
+                                thread_name_prefix='audio') as executor, \
+                self._children_stopped_on_error():
+            futures = [executor.submit(self._convert_audio_track_all_qualities, i, audio)
+                       for i, audio in enumerate(self.audio_streams)]
+            for future in as_completed(futures):
+                if not future.result():
                     success = False
 
         return success
@@ -1427,89 +2453,107 @@ class HLSConverter:
 
         master_file = self.output_dir / "master.m3u8"
 
-        with open(master_file, 'w', encoding='utf-8') as f:
-            f.write("#EXTM3U\n")
-            f.write("#EXT-X-VERSION:6\n\n")
+        # One directory listing answers every "was this rendition written?"
+        # below, instead of a stat per playlist
+        with os.scandir(self.output_dir) as entries:
+            present = {entry.name for entry in entries}
+
+        lines = ["#EXTM3U", "#EXT-X-VERSION:6", ""]
+
+        if self.audio_streams:
+            lines.append("# Audio tracks")
+            for i, audio in enumerate(self.audio_streams):
+                safe_lang = _safe_lang(audio.language)
+                default = "YES" if i == 0 else "NO"
+
+                for quality_level in self.enabled_qualities:
+                    if f"audio_{i}_{safe_lang}_{quality_level}.m3u8" in present:
+                        lines.append(
+                            f'#EXT-X-MEDIA:TYPE=AUDIO,'
+                            f'GROUP-ID="audio-{quality_level}",'
+                            f'NAME="{audio.title}",'
+                            f'LANGUAGE="{audio.language}",'
+                            f'DEFAULT={default},'
+                            f'AUTOSELECT={default},'
+                            f'CHANNELS="{audio.channels}",'
+                            f'URI="audio_{i}_{safe_lang}_{quality_level}.m3u8"'
+                        )
+
+            lines.append("")
+
+        lines.append("# Video variants")
+        for profile_name in ['high', 'medium', 'low']:
+            if profile_name not in self.enabled_qualities:
+                continue
 
-            if self.audio_streams:
-                f.write("# Audio tracks\n")
-                for i, audio in enumerate(self.audio_streams):
-                    safe_lang = re.sub(r'[^\w\-]', '_', audio['language'])
-
-                    for quality_level in self.enabled_qualities:
-                        audio_file = self.output_dir / f"audio_{i}_{safe_lang}_{quality_level}.m3u8"
-                        if audio_file.exists():
-                            f.write(f'#EXT-X-MEDIA:TYPE=AUDIO,')
-                            f.write(f'GROUP-ID="audio-{quality_level}",')
-                            f.write(f'NAME="{audio["title"]}",')
-                            f.write(f'LANGUAGE="{audio["language"]}",')
-                            f.write(f'DEFAULT={"YES" if i == 0 else "NO"},')
-                            f.write(f'AUTOSELECT={"YES" if i == 0 else "NO"},')
-                            f.write(f'CHANNELS="{audio["channels"]}",')
-                            f.write(f'URI="audio_{i}_{safe_lang}_{quality_level}.m3u8"\n')
-
-                f.write("\n")
-
-            f.write("# Video variants\n")
-            for profile_name in ['high', 'medium', 'low']:
-                if profile_name not in self.enabled_qualities:
-                    continue
-
-                profile = self.quality_profiles[profile_name]
-                audio_profile = self.audio_profiles[profile_name]
-                scale, width, height = self._calculate_scale(profile['height'])
-
-                video_playlist = f"video_{profile_name}.m3u8"
-
-                if (self.output_dir / video_playlist).exists():
-                    if profile_name == 'high' and self.stream_copy_used:
-                        if self.video_info['bitrate'] != 'N/A':
-                            try:
-                                video_bw = int(self.video_info['bitrate'])
-                            except:
-                                video_bw = int(profile['video_bitrate'].replace('k', '000'))
-                        else:
+            profile = self.quality_profiles[profile_name]
+            audio_profile = self.audio_profiles[profile_name]
+            scale, width, height = self._calculate_scale(profile['height'])
+
+            video_playlist = f"video_{profile_name}.m3u8"
+
+            if video_playlist in present:
+                if profile_name in self.copied_qualities:
+                    if self.video_info['bitrate'] != 'N/A':
+                        try:
+                            video_bw = int(self.video_info['bitrate'])
+                        except:
                             video_bw = int(profile['video_bitrate'].replace('k', '000'))
                     else:
                         video_bw = int(profile['video_bitrate'].replace('k', '000'))
+                else:
+                    video_bw = int(profile['video_bitrate'].replace('k', '000'))
+
+                audio_bw = int(audio_profile['bitrate'].replace('k', '000'))
+                total_bandwidth = video_bw + audio_bw
+
+                stream_inf = (
+                    f'#EXT-X-STREAM-INF:'
+                    f'BANDWIDTH={total_bandwidth},'
+                    f'AVERAGE-BANDWIDTH={int(total_bandwidth * 0.9)},'
+                    f'RESOLUTION={width}x{height},'
+                    f'CODECS="avc1.640029,mp4a.40.2",'
+                    f'FRAME-RATE={self.video_info["fps"]:.3f}'
+                )
+                if self.audio_streams:
+                    stream_inf += f',AUDIO="audio-{profile_name}"'
 
-                    audio_bw = int(audio_profile['bitrate'].replace('k', '000'))
-                    total_bandwidth = video_bw + audio_bw
-
-                    f.write(f'#EXT-X-STREAM-INF:')
-                    f.write(f'BANDWIDTH={total_bandwidth},')
-                    f.write(f'AVERAGE-BANDWIDTH={int(total_bandwidth * 0.9)},')
-                    f.write(f'RESOLUTION={width}x{height},')
-                    f.write(f'CODECS="avc1.640029,mp4a.40.2",')
-                    f.write(f'FRAME-RATE={self.video_info["fps"]:.3f}')
-
-                    if self.audio_streams:
-                        f.write(f',AUDIO="audio-{profile_name}"')
+                lines.append(stream_inf)
+                lines.append(video_playlist)
 
-                    f.write(f'\n{video_playlist}\n')
+        # One write for the whole playlist; the trailing '' ends the file with a newline
+        lines.append("")
+        with open(master_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
 
         print(f"   ✓ Master playlist created: {master_file}")
         return str(master_file)
 
-    def convert(self) -> bool:
-        """Main conversion process"""
-        mode_label = "Maximum Quality" if self.best_quality else "Balanced"
-
-        print("\n" + "="*70)
-        print(" "*15 + f"🎥 HLS VIDEO CONVERTER v6.2")
-        print("="*70)
-        print(f"📁 Input:  {self.input_file}")
-        print(f"📁 Output: {self.output_dir}")
-        print(f"⚙️  Mode: {mode_label}")
-        print(f"🎯 Qualities: {', '.join(self.enabled_qualities)}")
-        if self.force_reencode:
-            print(f"🔄 Force Re-encode: YES")
-        if self.dry_run:
-            print(f"🔍 DRY RUN: No files will be created")
-        print("="*70)
-
-        # Hardware acceleration
-        if self.hw_accel == 'auto':
+    def _warm_up(self, func):
+        """Run a subprocess-backed helper for its cached result; errors resurface later"""
+        try:
+            func()
+        except Exception:
+            pass
+
+    def preflight(self) -> bool:
+        """Hardware detection and pre-flight checks"""
+        # The subprocess-heavy parts (encoder list, ffprobe, idet) run
+        # concurrently first; the checks below then report in order from
+        # the cached results
+        ffmpeg_ok = self.check_ffmpeg()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            if self.hw_accel == 'auto':
+                pool.submit(self._warm_up, self._list_encoders)
+
+            pool.submit(self._warm_up, self._probe_once).result()
+            if self._probe_data is not None and not self.no_interlace_check and self._interlace_result is None:
+                pool.submit(self._warm_up, self._idet_output)
+
+        # Hardware acceleration: libx264 unless --hw-accel asks for an encoder
+        if self.hw_accel == 'none':
+            self.hw_accel = None
+        elif self.hw_accel == 'auto':
             detected_hw = self.detect_hardware_acceleration()
             if detected_hw:
                 self.hw_accel = detected_hw
@@ -1522,14 +2566,14 @@ class HLSConverter:
         if self.parallel and self.hw_accel:
             self._check_parallel_efficiency()
         elif self.parallel:
-            print(f"\n✅ Parallel Processing: {min(len(self.enabled_qualities), cpu_count())} workers\n")
+            print(f"\n✅ Parallel Processing: {min(len(self.enabled_qualities), self.max_parallel)} workers\n")
 
         # Pre-flight checks
-        print("\n" + "="*70)
+        print("\n" + BAR)
         print(" "*25 + "🔍 PRE-FLIGHT CHECKS")
-        print("="*70)
+        print(BAR)
 
-        if not self.check_ffmpeg():
+        if not ffmpeg_ok:
             return False
 
         if not self.probe_file():
@@ -1540,7 +2584,7 @@ class HLSConverter:
             return False
 
         if not self.check_existing_files():
-            print("❌ Aborted by user")
+            print("❌ Aborted: output directory has existing files")
             return False
 
         self.is_interlaced = self.detect_interlaced()
@@ -1549,134 +2593,303 @@ class HLSConverter:
             print("❌ Aborted: HDR content")
             return False
 
-        print("="*70)
+        print(BAR)
+
+        return True
+
+    def convert(self) -> bool:
+        """Main conversion process"""
+        mode_label = "Maximum Quality" if self.best_quality else "Balanced"
 
+        print("\n" + BAR)
+        print(" "*15 + f"🎥 HLS VIDEO CONVERTER v6.2")
+        print(BAR)
+        print(f"📁 Input:  {self.input_file}")
+        print(f"📁 Output: {self.output_dir}")
+        print(f"⚙️  Mode: {mode_label}")
+        print(f"🎯 Qualities: {', '.join(self.enabled_qualities)}")
+        print(f"🧮 CPUs: {cpu_count()} usable, up to {self.max_parallel} ffmpeg process(es) at once")
+        if self.force_reencode:
+            print(f"🔄 Force Re-encode: YES")
         if self.dry_run:
-            print("\n" + "="*70)
+            print(f"🔍 DRY RUN: No files will be created")
+        print(BAR)
+
+        if not self.preflight():
+            return False
+
+        if self.dry_run:
+            print("\n" + BAR)
             print(" "*20 + "🔍 DRY RUN SUMMARY")
-            print("="*70)
+            print(BAR)
             print("This is a preview. No encoding will occur.")
             print("Remove --dry-run to perform actual conversion.")
-            print("="*70 + "\n")
-
-        self.start_time = time.time()
+            print(BAR + "\n")
 
-        # Convert subtitles
-        if self.subtitle_streams:
-            self.convert_subtitles()
-            self.create_subtitle_manifest()
+        self.start_time = time.monotonic()
 
-        # Convert video
-        print(f"\n{'='*70}")
-        print(f"PHASE 1: Converting Video ({len(self.enabled_qualities)} qualities)")
-        if self.can_copy_video and 'high' in self.enabled_qualities:
-            print(f"         🎯 'high': Stream copy → CRF 15 fallback")
-        print(f"{'='*70}")
-
-        video_success = True
-
-        if self.parallel and len(self.enabled_qualities) > 1 and not self.dry_run:
-            with Pool(processes=min(len(self.enabled_qualities), cpu_count())) as pool:
-                convert_func = partial(self._convert_video_wrapper,
-                                      input_file=self.input_file,
-                                      output_dir=str(self.output_dir),
-                                      video_info=self.video_info,
-                                      hw_accel=self.hw_accel,
-                                      best_quality=self.best_quality,
-                                      enabled_qualities=self.enabled_qualities,
-                                      can_copy_video=self.can_copy_video,
-                                      is_interlaced=self.is_interlaced)
-
-                results = pool.map(convert_func,
-                                  [(name, self.quality_profiles[name]) for name in self.enabled_qualities])
-
-                video_success = all(results)
+        staging = self._start_staging() if self.tmp_encode and not self.dry_run else None
+        if staging is None:
+            video_success, audio_success, master_playlist = self._convert_phases()
         else:
-            for profile_name in self.enabled_qualities:
-                if not self.convert_video_quality_variant(profile_name, self.quality_profiles[profile_name]):
-                    video_success = False
-
-        # Convert audio
-        print(f"\n{'='*70}")
-        print("PHASE 2: Converting Audio")
-        print(f"{'='*70}")
-
-        audio_success = self.convert_all_audio_tracks()
-
-        # Create master playlist
-        master_playlist = self.create_master_playlist()
+            final_dir = self.output_dir
+            self.output_dir = staging
+            self._path_cache.clear()
+            # Only a finished run is published; a failed or interrupted one can
+            # leave renditions that end their playlists early
+            try:
+                video_success, audio_success, master_playlist = self._convert_phases()
+            except BaseException:
+                self._discard_staging(staging)
+                raise
+            finally:
+                self.output_dir = final_dir
+                self._path_cache.clear()
+            if video_success and audio_success:
+                self._publish_staging(staging)
+            else:
+                self._discard_staging(staging)
+            master_playlist = str(final_dir / os.path.basename(master_playlist))
 
         # Summary
         if self.dry_run:
             elapsed = 0
         else:
-            elapsed = time.time() - self.start_time
-
-        print("\n" + "="*70)
-        print(" "*20 + "✅ CONVERSION COMPLETED!")
-        print("="*70)
-        print(f"📁 Output directory:    {self.output_dir}")
-        print(f"🎬 Master playlist:     {master_playlist}")
-        print(f"📺 Source resolution:   {self.video_info['width']}x{self.video_info['height']}")
-        print(f"🎞️  Source codec:        {self.video_info['codec'].upper()}")
+            elapsed = time.monotonic() - self.start_time
+
+        lines = [
+            "\n" + BAR,
+            " "*20 + "✅ CONVERSION COMPLETED!",
+            BAR,
+            f"📁 Output directory:    {self.output_dir}",
+            f"🎬 Master playlist:     {master_playlist}",
+            f"📺 Source resolution:   {self.video_info['width']}x{self.video_info['height']}",
+            f"🎞️  Source codec:        {self.video_info['codec'].upper()}",
+        ]
 
         if self.hw_accel:
-            print(f"🚀 Hardware accel:      {self.hw_accel.upper()}")
+            lines.append(f"🚀 Hardware accel:      {self.hw_accel.upper()}")
 
         if elapsed > 0:
-            print(f"⏱️  Total time:          {self._format_time(elapsed)}")
+            lines.append(f"⏱️  Total time:          {self._format_time(elapsed)}")
 
-        print(f"\n   Generated Quality Tiers:")
+        lines.append(f"\n   Generated Quality Tiers:")
         for q in self.enabled_qualities:
-            _, w, h = self._calculate_scale(self.quality_profiles[q]['height'])
-            if q == 'high' and self.stream_copy_used:
-                print(f"   • {q.capitalize():6} {w}x{h} - ⭐ STREAM COPY (100% original)")
-            elif q == 'high' and self.can_copy_video:
-                print(f"   • {q.capitalize():6} {w}x{h} - ⚡ VISUALLY LOSSLESS (CRF 15)")
-            else:
-                print(f"   • {q.capitalize():6} {w}x{h} @ {self.quality_profiles[q]['video_bitrate']}")
+            profile = self.quality_profiles[q]
+            _, w, h = self._calculate_scale(profile['height'])
+            template = _TIER_SUMMARY[q in self.copied_qualities, bool(profile.get('stream_copy'))]
+            lines.append(template.format(q=q.capitalize(), w=w, h=h, bitrate=profile['video_bitrate']))
 
-        print(f"\n🔊 Audio tracks:        {len(self.audio_streams)} x {len(self.enabled_qualities)} qualities")
-        print(f"💬 Subtitle tracks:     {len(self.converted_subtitles)} WebVTT files")
+        lines.append(f"\n🔊 Audio tracks:        {len(self.audio_streams)} x {len(self.enabled_qualities)} qualities")
+        lines.append(f"💬 Subtitle tracks:     {len(self.converted_subtitles)} WebVTT files")
 
         if self.converted_subtitles:
-            print(f"📄 Subtitle manifest:   subtitles.json")
+            lines.append(f"📄 Subtitle manifest:   subtitles.json")
+
+        lines.append(BAR + "\n")
 
-        print("="*70 + "\n")
+        # One write, so batch workers sharing the terminal can't interleave into it
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
         return video_success and audio_success
 
+    def convert_all_in_one(self) -> bool:
+        """Encode video rungs, audio and text subtitles in one ffmpeg run, reading the source once"""
+        if any(self.quality_profiles[q].get('stream_copy') for q in self.enabled_qualities):
+            print(f"\n   ⚠️  Single-input run skipped: stream-copied rungs are validated on their own")
+            return False
+
+        encode_rungs = [q for q in self.enabled_qualities if not self._reuse_existing_video(q)]
+        if not encode_rungs:
+            return False
+
+        print(f"\n{BAR}")
+        print(f"🎬 Converting video, audio and subtitles in a single pass")
+        print(BAR)
+        print(f"\n🎬 Video: {', '.join(encode_rungs)}")
+
+        cmd = self._base_input_cmd(hwaccel=True)
+        cmd.extend(self._video_variants_args(encode_rungs))
+
+        outputs = [f"video_{q}" for q in encode_rungs]
+        for i, audio in enumerate(self.audio_streams):
+            safe_lang = _safe_lang(audio.language)
+            qualities = [q for q in self.enabled_qualities
+                         if not self._audio_rendition_complete(f"audio_{i}_{safe_lang}_{q}")]
+            if qualities:
+                print(f"\n📻 Audio Track #{i}: {audio.title} ({audio.language}) - {', '.join(qualities)}")
+            for quality in qualities:
+                cmd.extend(self._audio_output_args(i, audio, quality))
+                outputs.append(f"audio_{i}_{safe_lang}_{quality}")
+
+        for i, subtitle in self.text_subtitle_streams:
+            cmd.extend(self._subtitle_output_args(subtitle, self._subtitle_output_path(i, subtitle)))
+        cmd.extend(['-v', 'warning', '-y'])
+
+        print(f"\n   Encoding...")
+        returncode, _ = self._run_ffmpeg_with_progress(cmd)
+        if returncode != 0:
+            print(f"\n   ❌ Single-input run failed - converting subtitles, video and audio separately")
+            self._discard_renditions(outputs)
+            return False
+        print(f"\n   ✅ Video and audio completed")
+
+        if self.subtitle_streams:
+            # Checks each file and redoes any track that came out empty
+            self.convert_subtitles(extracted=True)
+            self.create_subtitle_manifest()
+        return True
+
+    def _convert_subtitle_phase(self):
+        """Convert subtitles and write their manifest"""
+        self.convert_subtitles()
+        self.create_subtitle_manifest()
+
+    def _convert_phases(self) -> Tuple[bool, bool, str]:
+        """Subtitles, video and audio, then the master playlist; returns (video ok, audio ok, master path)"""
+        # A failed single-input run discards its renditions, and the phases below redo them
+        if self.single_input and not self.dry_run and self.convert_all_in_one():
+            self._save_copied_qualities()
+            return True, True, self.create_master_playlist()
+
+        jobs = []
+        if self.subtitle_streams:
+            jobs.append(('subtitles', self._convert_subtitle_phase))
+        if self.audio_streams:
+            jobs.append(('audio', self.convert_all_audio_tracks))
+
+        # Subtitles and audio don't depend on the video encode, so each runs
+        # alongside it on its own thread; their output is held back and printed
+        # after PHASE 1
+        background = {}
+        if not self.no_pipeline and not self.dry_run and self.max_parallel > 1:
+            stream = sys.stdout
+            for prefix, job in jobs:
+                sys.stdout = _ThreadRoutedStdout(sys.stdout, prefix)
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=prefix)
+                background[prefix] = (sys.stdout, executor, executor.submit(job))
+        elif self.subtitle_streams:
+            self._convert_subtitle_phase()
+
+        # Convert video
+        header = [f"\n{BAR}", f"PHASE 1: Converting Video ({len(self.enabled_qualities)} qualities)"]
+        header.extend(f"         🎯 '{q}': Stream copy → CRF 15 fallback"
+                      for q in self.enabled_qualities if self.quality_profiles[q].get('stream_copy'))
+        header.append(BAR)
+        sys.stdout.write("\n".join(header) + "\n")
+
+        try:
+            with self._children_stopped_on_error():
+                video_success = self.convert_all_video_variants()
+        finally:
+            if background:
+                for _, executor, _ in background.values():
+                    executor.shutdown(wait=True)
+                sys.stdout = stream
+
+        if not self.dry_run:
+            self._save_copied_qualities()
+
+        if 'subtitles' in background:
+            output, _, future = background['subtitles']
+            sys.stdout.write(output.held.getvalue())
+            future.result()
+
+        # Convert audio
+        sys.stdout.write(f"\n{BAR}\nPHASE 2: Converting Audio\n{BAR}\n")
+
+        if 'audio' in background:
+            output, _, future = background['audio']
+            sys.stdout.write(output.held.getvalue())
+            audio_success = future.result()
+        else:
+            audio_success = self.convert_all_audio_tracks()
+
+        # Create master playlist
+        master_playlist = self.create_master_playlist()
+
+        return video_success, audio_success, master_playlist
+
     def _format_time(self, seconds: float) -> str:
         """Format seconds to readable time"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
+        minutes, secs = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
 
-        if hours > 0:
+        if hours:
             return f"{hours}h {minutes}m {secs}s"
-        elif minutes > 0:
+        if minutes:
             return f"{minutes}m {secs}s"
-        else:
-            return f"{secs}s"
+        return f"{secs}s"
 
-    @staticmethod
-    def _convert_video_wrapper(args, input_file, output_dir, video_info, hw_accel, best_quality, enabled_qualities, can_copy_video, is_interlaced):
-        """Wrapper for parallel video conversion"""
-        profile_name, profile = args
-
-        temp_converter = HLSConverter(
-            input_file,
-            output_dir,
-            best_quality=best_quality,
-            hw_accel=hw_accel,
-            explicit_qualities=enabled_qualities
-        )
-        temp_converter.video_info = video_info
-        temp_converter.can_copy_video = can_copy_video
-        temp_converter.is_interlaced = is_interlaced
-        temp_converter._determine_quality_ladder()
+    @classmethod
+    def run_batch(cls, files: List[str], output_root: str, workers: int, **options) -> Dict[str, bool]:
+        """Convert several files concurrently, each into output_root/<file stem>, suffixed if stems repeat"""
+        import multiprocessing
+
+        options = dict(options)
+        options['parallel'] = False  # pool workers are daemonic and can't fork their own pool
+
+        # Detect hardware once here instead of in every child
+        hw_accel = options.pop('hw_accel', None)
+        if hw_accel == 'auto':
+            hw_accel = cls(files[0], output_root).detect_hardware_acceleration()
+
+        workers = max(1, min(workers, len(files)))
+        if hw_accel == 'nvenc':
+            try:
+                gpu_name = cls._nvidia_gpu_name()
+                if not cls._is_workstation_gpu(gpu_name):
+                    workers = min(workers, CONSUMER_NVENC_SESSIONS)
+            except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+                workers = min(workers, CONSUMER_NVENC_SESSIONS)
+
+        print(f"\n📦 Batch: {len(files)} file(s), {workers} worker(s)")
+
+        # Inputs sharing a stem (a/ep1.mkv, b/ep1.mp4) would write into the
+        # same directory; later ones get a numeric suffix instead
+        taken = {Path(f).stem for f in files}
+        jobs = []
+        seen = set()
+        for f in files:
+            name = stem = Path(f).stem
+            if name in seen:
+                n = 2
+                while f"{stem}_{n}" in taken:
+                    n += 1
+                name = f"{stem}_{n}"
+                taken.add(name)
+                print(f"⚠️  {f}: output goes to {name}/, '{stem}' is used by another input")
+            seen.add(name)
+            jobs.append((f, str(Path(output_root) / name), options))
+
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(processes=workers, initializer=_init_batch_worker,
+                      initargs=(hw_accel,)) as pool:
+            results = pool.map(_convert_batch_file, jobs, chunksize=1)
+
+        return dict(zip(files, results))
 
-        return temp_converter.convert_video_quality_variant(profile_name, profile)
+
+# hw_accel chosen by run_batch, set in each pool worker by _init_batch_worker
+_batch_hw_accel = None
+
+
+def _init_batch_worker(hw_accel: Optional[str]):
+    """Pool initializer: reuse the parent's hardware detection result"""
+    global _batch_hw_accel
+    _batch_hw_accel = hw_accel
+
+
+def _convert_batch_file(job: Tuple[str, str, Dict]) -> bool:
+    """Pool task: convert one file of a batch"""
+    input_file, output_dir, options = job
+    try:
+        converter = HLSConverter(input_file, output_dir, hw_accel=_batch_hw_accel, **options)
+        return converter.convert()
+    except Exception as e:
+        print(f"\n❌ {input_file}: {e}")
+        return False
 
 
 def main():
@@ -1700,6 +2913,12 @@ Examples:
   # Force re-encode even if H.264
   %(prog)s input.mkv output/ --force-reencode
 
+  # Unattended (never prompts; safe for batch jobs)
+  %(prog)s input.mkv output/ --assume-yes --on-existing=overwrite --allow-hdr
+
+  # Batch: several files, two at a time, into output/<name>/
+  %(prog)s a.mkv b.mkv c.mkv output/ --jobs=2 --assume-yes
+
 Intelligent H.264 Strategy:
   Stage 1: Try STREAM COPY (instant, 100% original)
            ↓ Validates segments + keyframes
@@ -1713,6 +2932,7 @@ Hardware Acceleration:
   videotoolbox:  Apple (macOS)
   amf:           AMD GPU
   vaapi:         Linux VAAPI
+  none:          Software (libx264), the default
 
 Safety Features:
   • Disk space check
@@ -1724,17 +2944,17 @@ Safety Features:
         """
     )
 
-    parser.add_argument('input', help='Input video file')
-    parser.add_argument('output', help='Output directory for HLS files')
+    parser.add_argument('input', nargs='+', help='Input video file(s)')
+    parser.add_argument('output', help='Output directory for HLS files (one subdirectory per input in batch mode)')
     parser.add_argument('--best-quality', '-b', action='store_true',
                         help='Maximum quality (slow presets, CRF 18-23)')
     parser.add_argument('--explicit-qualities', '-q', type=str, default=None,
                         help='Comma-separated: high,medium,low')
     parser.add_argument('--hw-accel', type=str, default=None,
-                        choices=['auto', 'nvenc', 'qsv', 'videotoolbox', 'amf', 'vaapi'],
-                        help='Hardware acceleration')
+                        choices=['auto', 'nvenc', 'qsv', 'videotoolbox', 'amf', 'vaapi', 'none'],
+                        help='Hardware acceleration (default: software)')
     parser.add_argument('--parallel', '-p', action='store_true',
-                        help='Encode qualities in parallel')
+                        help='Encode qualities in parallel processes if the single-pass encode fails')
     parser.add_argument('--force-reencode', '-f', action='store_true',
                         help='Force re-encode (disable stream copy)')
     parser.add_argument('--dry-run', '-d', action='store_true',
@@ -1743,12 +2963,32 @@ Safety Features:
                         help='Overwrite existing files without asking')
     parser.add_argument('--no-interlace-check', action='store_true',
                         help='Skip interlacing detection')
+    parser.add_argument('--assume-yes', '-y', action='store_true',
+                        help='Answer yes to every prompt (for batch/unattended runs)')
+    parser.add_argument('--on-existing', type=str, default=None,
+                        choices=['overwrite', 'skip', 'abort'],
+                        help='What to do with existing output files instead of asking')
+    parser.add_argument('--allow-hdr', action='store_true',
+                        help='Convert HDR sources to SDR without asking')
+    parser.add_argument('--no-pipeline', action='store_true',
+                        help='Convert subtitles and audio before/after video instead of alongside it')
+    parser.add_argument('--max-parallel', type=int, default=None,
+                        help='Most ffmpeg processes one conversion runs at once, across video, audio and subtitles (default: CPU count; 1 runs everything in turn)')
+    parser.add_argument('--tmp-encode', action='store_true',
+                        help='Write output to /dev/shm first and move it into place at the end')
+    parser.add_argument('--single-input', action='store_true',
+                        help='Encode video, audio and subtitles in one ffmpeg run so the source is read once')
+    parser.add_argument('--segment-type', type=str, default='fmp4', choices=['fmp4', 'mpegts'],
+                        help='Segment container (default: fmp4/CMAF; mpegts for players without fMP4 support)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Files to convert concurrently in batch mode')
 
     args = parser.parse_args()
 
-    if not os.path.isfile(args.input):
-        print(f"❌ ERROR: Input file not found: {args.input}")
-        sys.exit(1)
+    for input_file in args.input:
+        if not os.path.isfile(input_file):
+            print(f"❌ ERROR: Input file not found: {input_file}")
+            sys.exit(1)
 
     explicit_qualities = None
     if args.explicit_qualities:
@@ -1761,20 +3001,38 @@ Safety Features:
             print(f"   Valid: high, medium, low")
             sys.exit(1)
 
-        seen = set()
-        explicit_qualities = [q for q in explicit_qualities if not (q in seen or seen.add(q))]
-
-    converter = HLSConverter(args.input, args.output,
-                            best_quality=args.best_quality,
-                            explicit_qualities=explicit_qualities,
-                            hw_accel=args.hw_accel,
-                            parallel=args.parallel,
-                            force_reencode=args.force_reencode,
-                            dry_run=args.dry_run,
-                            overwrite=args.overwrite,
-                            no_interlace_check=args.no_interlace_check)
+        explicit_qualities = list(dict.fromkeys(explicit_qualities))
+
+    options = dict(best_quality=args.best_quality,
+                   explicit_qualities=explicit_qualities,
+                   hw_accel=args.hw_accel,
+                   parallel=args.parallel,
+                   force_reencode=args.force_reencode,
+                   dry_run=args.dry_run,
+                   overwrite=args.overwrite,
+                   no_interlace_check=args.no_interlace_check,
+                   assume_yes=args.assume_yes,
+                   on_existing=args.on_existing,
+                   allow_hdr=args.allow_hdr,
+                   no_pipeline=args.no_pipeline,
+                   tmp_encode=args.tmp_encode,
+                   max_parallel=args.max_parallel,
+                   single_input=args.single_input,
+                   segment_type=args.segment_type)
 
     try:
+        if len(args.input) > 1:
+            results = HLSConverter.run_batch(args.input, args.output, args.jobs, **options)
+
+            print("\n" + BAR)
+            print(f"📦 Batch complete: {sum(results.values())}/{len(results)} succeeded")
+            for input_file, ok in results.items():
+                print(f"   {'✅' if ok else '❌'} {input_file}")
+            print(BAR + "\n")
+
+            sys.exit(0 if all(results.values()) else 1)
+
+        converter = HLSConverter(args.input[0], args.output, **options)
         if converter.convert():
             sys.exit(0)
         else: